@@ -0,0 +1,110 @@
+# Model version management: list, load and switch models without a restart
+# + request profiles written by the opt-in profiler (PROFILING_ENABLED)
+import glob
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.dependencies import verify_api_key
+from app.services import drift
+from app.services.model_registry import registry
+from app.utils.profiling import collapsed_stacks, load_stats, stats_text
+
+router = APIRouter(prefix='/admin', dependencies=[Depends(verify_api_key)])
+
+
+class LoadModelInput(BaseModel):
+    path: str
+    activate: bool = True
+
+
+@router.get('/models')
+def list_models():
+    """Active version, versions loaded in this worker and model files on disk."""
+    return registry.describe()
+
+
+@router.post('/models/load')
+async def load_model(body: LoadModelInput):
+    """Load + warm up a model file, then (optionally) switch traffic to it."""
+    # only files from the model directory can be loaded
+    model_dir = os.path.realpath(os.path.dirname(settings.MODEL_PATH) or ".")
+    path = os.path.realpath(body.path)
+    if os.path.dirname(path) != model_dir or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Model file not found in the model directory.'
+        )
+    loaded = await run_in_threadpool(registry.load, path)
+    if body.activate:
+        registry.activate(loaded.version)
+    return registry.describe()
+
+
+@router.post('/models/{version}/activate')
+def activate_model(version: str):
+    """Switch traffic to an already loaded version (e.g. roll back)."""
+    try:
+        registry.activate(version)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Model version {version} is not loaded.'
+        )
+    return registry.describe()
+
+
+# ── Traffic drift ────────────────────────────────────────────────────────────
+
+@router.get('/drift')
+async def traffic_drift():
+    """Live feature / price distributions (all workers) against the training baseline."""
+    # async: runs on the event loop, so the sketches are not updated mid-read
+    if drift.traffic is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='DRIFT_ENABLED is off.')
+    return drift.report()
+
+
+# ── Profiles ─────────────────────────────────────────────────────────────────
+
+def _profile_files() -> list[str]:
+    """Saved profiles, newest first (all workers write to the same PROFILE_DIR)."""
+    files = glob.glob(os.path.join(settings.PROFILE_DIR, "*.prof"))
+    return sorted(files, key=os.path.getmtime, reverse=True)
+
+
+@router.get('/profiles')
+def list_profiles():
+    return [
+        {"name": os.path.basename(path), "size": os.path.getsize(path), "modified_at": os.path.getmtime(path)}
+        for path in _profile_files()
+    ]
+
+
+@router.get('/profiles/aggregate')
+async def aggregate_profiles(
+    format: str = Query('collapsed', pattern='^(collapsed|pstats)$'),
+    limit: int = Query(50, ge=1, description='newest profiles to merge'),
+    sort: str = Query('cumulative', pattern='^(cumulative|tottime|ncalls)$'),
+):
+    """Merge the newest profiles: collapsed stacks (flame graph input) or pstats text."""
+    stats = await run_in_threadpool(load_stats, _profile_files()[:limit])
+    if stats is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No profiles recorded yet.')
+    if format == 'collapsed':
+        text = await run_in_threadpool(collapsed_stacks, stats)
+    else:
+        text = await run_in_threadpool(stats_text, stats, sort)
+    return PlainTextResponse(text)
+
+
+@router.get('/profiles/{name}')
+def download_profile(name: str):
+    """One raw profile (pstats format: `python -m pstats <file>`, snakeviz, ...)."""
+    path = os.path.join(settings.PROFILE_DIR, os.path.basename(name))
+    if not name.endswith('.prof') or not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Profile not found.')
+    return FileResponse(path, media_type='application/octet-stream', filename=os.path.basename(name))
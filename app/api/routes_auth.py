@@ -1,9 +1,14 @@
 import re
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
 from pydantic import BaseModel, field_validator
 
-from app.core.security import hash_password, verify_password, create_token
-from app.db.database import create_user, get_user_by_email, email_exists
+from app.core.security import (
+    hash_password_async,
+    verify_password_async,
+    password_needs_rehash,
+    create_token,
+)
+from app.db.database import create_user_async, get_user_by_email_async, update_user_password_async
 
 router = APIRouter()
 
@@ -38,28 +43,44 @@ class LoginInput(BaseModel):
 
 # ── Endpoints ────────────────────────────────────────────────────────────────
 
+# bcrypt runs on its own bounded pool (app/core/security.py) so auth bursts
+# can't starve the threadpool /predict runs on.
+
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-def signup(user: SignupInput):
+async def signup(user: SignupInput):
     """Register a new user with email + password."""
-    if email_exists(user.email):
+    hashed = await hash_password_async(user.password)
+    # single INSERT, the UNIQUE constraint on email catches duplicates
+    if not await create_user_async(user.email, hashed):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="An account with this email already exists.",
         )
-    create_user(user.email, hash_password(user.password))
     return {"message": f"Account created for {user.email}. You can now log in."}
 
 
 @router.post("/login")
-def login(user: LoginInput):
+async def login(user: LoginInput, background_tasks: BackgroundTasks):
     """Authenticate and receive a JWT token."""
-    db_user = get_user_by_email(user.email.strip().lower())
+    db_user = await get_user_by_email_async(user.email.strip().lower())
 
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    if not db_user or not await verify_password_async(user.password, db_user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password.",
         )
 
+    # Re-hash with the configured cost after the response is sent
+    if password_needs_rehash(db_user["password"]):
+        background_tasks.add_task(upgrade_password_hash, db_user["email"], user.password)
+
     token = create_token({"sub": db_user["email"]})
-    return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": token, "token_type": "bearer"}
+
+
+async def upgrade_password_hash(email: str, plain: str):
+    try:
+        hashed = await hash_password_async(plain)
+    except HTTPException:
+        return  # pool is saturated, try again on the next login
+    await update_user_password_async(email, hashed)
\ No newline at end of file
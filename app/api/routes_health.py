@@ -0,0 +1,24 @@
+# Liveness and readiness probes for the container orchestrator
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.services import model_service
+
+router = APIRouter()
+
+
+@router.get('/health')
+def health():
+    # process is up and serving HTTP
+    return {"status": "ok"}
+
+
+@router.get('/ready')
+def ready():
+    # ready only once the model is loaded and the warm-up batch has run
+    if not model_service.is_loaded() or not model_service.warmed_up:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming up"},
+        )
+    return {"status": "ready", "model_version": model_service.active_version()}
@@ -1,8 +1,17 @@
 # get user  input and give prediction
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+import csv
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from app.core.config import settings
+from app.core.admission import enforce_rate_limit
 from app.core.dependencies import get_current_user, verify_api_key
-from app.services.model_service import predict_car_price
+from app.services.csv_scoring import iter_lines, missing_columns, score_csv_stream
+from app.services.model_registry import registry
+from app.services.model_service import predict_car_price, predict_car_prices
+from app.utils.serialization import MSGPACK, accepts_msgpack, dumps_msgpack, loads_body
 
 router = APIRouter()
 
@@ -23,8 +32,74 @@ class CarFeatures(BaseModel):
 
 
 @router.post('/predict')
-def predict_price(car: CarFeatures, user=Depends(get_current_user), _ = Depends(verify_api_key)):
+async def predict_price(car: CarFeatures, user=Depends(get_current_user), _ = Depends(verify_api_key),
+        _limit = Depends(enforce_rate_limit)):
     # convert the car data from json to dict
-    result = predict_car_price(car.model_dump())
+    # concurrent cache misses are coalesced into one model.predict (MICROBATCH_*)
+    result = await predict_car_price(car.model_dump())
     price = float(result['prediction'])
     return {"predicted_price": f"{price:,.2f}"}
+
+
+batch_adapter = TypeAdapter(list[CarFeatures])
+
+
+@router.post('/predict/batch', openapi_extra={
+    "requestBody": {"content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/CarFeatures"}}},
+        MSGPACK: {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/CarFeatures"}}},
+    }, "required": True},
+})
+async def predict_price_batch(request: Request, user=Depends(get_current_user), _ = Depends(verify_api_key),
+        _limit = Depends(enforce_rate_limit)):
+    # Body is JSON or msgpack (Content-Type); the response follows Accept
+    try:
+        cars = loads_body(await request.body(), request.headers.get('content-type'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Malformed request body')
+    # One auth + one model pass for the whole list
+    if isinstance(cars, list) and len(cars) > settings.PREDICT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'Batch size is limited to {settings.PREDICT_BATCH_MAX_SIZE} cars.'
+        )
+    try:
+        cars = batch_adapter.validate_python(cars)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+    results = await predict_car_prices([car.model_dump() for car in cars])
+    content = {
+        "predicted_prices": [f"{float(r['prediction']):,.2f}" for r in results]
+    }
+    if accepts_msgpack(request.headers.get('accept')):
+        return Response(dumps_msgpack(content), media_type=MSGPACK)
+    return content
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that keeps reading the request body while it streams.
+    The stock one listens for a client disconnect on `receive`, which would
+    swallow the body chunks we still need; a disconnect shows up as
+    ClientDisconnect from request.stream() instead.
+    """
+
+    async def listen_for_disconnect(self, receive):
+        await anyio.sleep_forever()
+
+
+@router.post('/predict/csv')
+async def predict_price_csv(request: Request, user=Depends(get_current_user), _ = Depends(verify_api_key),
+        _limit = Depends(enforce_rate_limit)):
+    # Body is the raw CSV (Content-Type: text/csv), read and scored chunk by chunk
+    lines = iter_lines(request.stream())
+    first_line = await anext(lines, None)
+    header = next(csv.reader([first_line])) if first_line else []
+    missing = missing_columns(header)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'CSV is missing columns: {", ".join(missing)}'
+        )
+    # One model version for the whole file; bulk scoring skips the prediction cache
+    rows = score_csv_stream(header, lines, registry.active, settings.CSV_CHUNK_ROWS)
+    return BodyStreamingResponse(rows, media_type='text/csv')
@@ -0,0 +1,90 @@
+# Bounded in-process LRU cache with per-entry TTL
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    Thread-safe LRU cache limited by entry count and (optionally) bytes.
+
+    Every entry carries its own expiry time (capped at `ttl`), so values
+    promoted from Redis never outlive their Redis TTL. `evictions` is an
+    optional Prometheus Counter with `tier` and `reason` labels.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int = 0, name: str = "local", evictions=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 = no byte limit
+        self.ttl = ttl
+        self.name = name
+        self.evictions = evictions
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: list[str]) -> list:
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    results.append(None)
+                elif entry[0] <= now:
+                    self._remove(key, "expired")
+                    results.append(None)
+                else:
+                    self._data.move_to_end(key)
+                    results.append(entry[1])
+        return results
+
+    def set(self, key: str, value, ttl: float = None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl: float = None):
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, value in items.items():
+                if key in self._data:
+                    self._remove(key, None)
+                size = _sizeof(key, value)
+                self._data[key] = (expires_at, value, size)
+                self._bytes += size
+            self._shrink()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str, reason):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+        if reason and self.evictions is not None:
+            self.evictions.labels(tier=self.name, reason=reason).inc()
+
+    def _shrink(self):
+        # Oldest (least recently used) entries go first
+        while len(self._data) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+            key = next(iter(self._data))
+            self._remove(key, "size")
+
+
+def _sizeof(key: str, value) -> int:
+    size = sys.getsizeof(key) + sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
@@ -0,0 +1,87 @@
+# In-memory stand-in for the async Redis client (CACHE_BACKEND=memory)
+# Implements only the commands the app uses. Meant for benchmarks and local
+# runs without Redis; every worker has its own private copy.
+import time
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._get(key)
+
+    async def mget(self, keys):
+        return [self._get(key) for key in keys]
+
+    async def pttl(self, key):
+        if self._get(key) is None:
+            return -2
+        expires_at = self._data[key][1]
+        return -1 if expires_at is None else int((expires_at - time.monotonic()) * 1000)
+
+    async def setex(self, key, seconds, value):
+        self._data[key] = (value, time.monotonic() + seconds)
+        return True
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and self._get(key) is not None:
+            return None
+        ttl = px / 1000 if px else ex
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        return True
+
+    async def delete(self, *keys):
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def hset(self, name, key, value):
+        fields = self._get(name)
+        if fields is None:
+            fields = {}
+            self._data[name] = (fields, None)
+        added = key not in fields
+        fields[key] = value
+        return int(added)
+
+    async def hgetall(self, name):
+        return dict(self._get(name) or {})
+
+    async def hdel(self, name, *keys):
+        fields = self._get(name) or {}
+        return sum(fields.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=False):
+        return _Pipeline(self)
+
+    async def aclose(self):
+        self._data.clear()
+
+
+class _Pipeline:
+    """Queues commands and runs them on execute(), like redis-py's Pipeline."""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
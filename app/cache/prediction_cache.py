@@ -0,0 +1,53 @@
+# Two-tier prediction cache: in-process LRU -> Redis
+# Reads go local first, then Redis (promoting hits into the local tier).
+# Writes go to both tiers with the same TTL; the Redis write is fire-and-forget.
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, CACHE_EVICTIONS, timed_stage
+from app.cache.local_cache import LocalCache
+from app.cache import redis_cache
+
+local_cache = LocalCache(
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+    max_bytes=settings.LOCAL_CACHE_MAX_BYTES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    evictions=CACHE_EVICTIONS,
+)
+
+
+async def get_cached_predictions(keys: list[str]) -> list:
+    with timed_stage("cache_local"):
+        results = local_cache.get_many(keys)
+
+    remote_keys = [key for key, value in zip(keys, results) if value is None]
+    local_hits = len(keys) - len(remote_keys)
+    if local_hits:
+        CACHE_REQUESTS.labels(tier="local", result="hit").inc(local_hits)
+    if not remote_keys:
+        return results
+    CACHE_REQUESTS.labels(tier="local", result="miss").inc(len(remote_keys))
+
+    with timed_stage("cache_redis"):
+        remote = dict(zip(remote_keys, await redis_cache.get_cached_predictions_with_ttl(remote_keys)))
+    promoted = 0
+    for i, key in enumerate(keys):
+        if results[i] is not None or key not in remote:
+            continue
+        value, ttl = remote[key]
+        if value:
+            results[i] = value
+            # Promote with the TTL Redis has left, so staleness stays bounded
+            local_cache.set(key, value, ttl=ttl)
+            promoted += 1
+
+    if promoted:
+        CACHE_REQUESTS.labels(tier="redis", result="hit").inc(promoted)
+    if len(remote) - promoted:
+        CACHE_REQUESTS.labels(tier="redis", result="miss").inc(len(remote) - promoted)
+    return results
+
+
+def set_cached_predictions(items: dict):
+    if not items:
+        return
+    local_cache.set_many(items)
+    redis_cache.schedule_cached_predictions(items, expiry=settings.CACHE_TTL_SECONDS)
@@ -1,32 +1,214 @@
-import os
-import json
-import redis
-from dotenv import load_dotenv
-
-load_dotenv()
-
-REDIS_URL = os.getenv("REDIS_URL")
-
-redis_client = redis.StrictRedis.from_url(REDIS_URL, decode_responses=True)
-
-
-def get_cached_prediction(key: str):
+import asyncio
+import contextvars
+import time
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import REDIS_CIRCUIT_OPEN, timed_stage
+from app.utils.serialization import pack_prediction, unpack_prediction
+
+
+# ── Circuit breaker ───────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """
+    Stops calling Redis after `failure_threshold` consecutive failures.
+
+    While open, every call is skipped (cache miss) for `reset_timeout`
+    seconds. After that a single probe is let through: success closes the
+    breaker again, failure re-opens it for another cool-off.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self.probing = True  # half-open: this caller is the probe
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        REDIS_CIRCUIT_OPEN.set(0)
+
+    def release_probe(self):
+        """The probe ended without telling us anything (cancelled, or a bug)."""
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            REDIS_CIRCUIT_OPEN.set(1)
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS_BREAKER_FAILURES,
+    reset_timeout=settings.REDIS_BREAKER_RESET_SECONDS,
+)
+
+
+# ── Client ────────────────────────────────────────────────────────────────────
+
+_client = None
+_pending_writes = set()  # keep fire-and-forget tasks referenced
+
+
+def get_client():
+    """
+    Lazily build one pooled async client. None when caching is off
+    (CACHE_BACKEND=none, or no REDIS_URL with the default redis backend).
+    """
+    global _client
+    if _client is None and settings.CACHE_BACKEND == 'memory':
+        from app.cache.memory_redis import InMemoryRedis
+        _client = InMemoryRedis()
+    elif _client is None and settings.CACHE_BACKEND == 'redis' and settings.REDIS_URL:
+        pool = aioredis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            decode_responses=False,  # values are binary (see pack_prediction)
+        )
+        _client = aioredis.Redis(connection_pool=pool)
+    return _client
+
+
+async def close_client():
+    """Flush pending writes and close the pool (app shutdown)."""
+    global _client
+    if _pending_writes:
+        await asyncio.gather(*_pending_writes, return_exceptions=True)
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def guarded(operation):
+    """
+    Run `operation(client)` through the circuit breaker.
+    Returns (ok, result); any Redis problem is a cache miss, never an error.
+    """
+    client = get_client()
+    if client is None or not breaker.allow():
+        return False, None
     try:
-        value = redis_client.get(key)
-        if value:
-            return json.loads(value)
-        return None
-    except (redis.RedisError, json.JSONDecodeError):
-        return None
-
-
-def set_cached_prediction(key: str, value: dict, expiry: int = 3600):
-    redis_client.setex(key, expiry, json.dumps(value))
-
-
-
-
-
+        result = await operation(client)
+    except (RedisError, OSError, asyncio.TimeoutError):
+        breaker.record_failure()
+        return False, None
+    except BaseException:
+        # CancelledError or an unexpected error: free the half-open probe
+        # slot, otherwise allow() would keep refusing every call for good
+        breaker.release_probe()
+        raise
+    breaker.record_success()
+    return True, result
+
+
+# ── Cache helpers ─────────────────────────────────────────────────────────────
+
+async def get_cached_predictions(keys: list[str]) -> list:
+    """Fetch many keys in one round trip (MGET). Missing keys come back as None."""
+    if not keys:
+        return []
+    ok, values = await guarded(lambda client: client.mget(keys))
+    if not ok:
+        return [None] * len(keys)
+    return [unpack_prediction(value) for value in values]
+
+
+async def get_cached_predictions_with_ttl(keys: list[str]) -> list:
+    """
+    Like get_cached_predictions, but also returns each key's remaining TTL
+    in seconds, as (value, ttl) pairs. GET + PTTL per key, still one round trip.
+    """
+    if not keys:
+        return []
+
+    async def operation(client):
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.pttl(key)
+        return await pipe.execute()
+
+    ok, replies = await guarded(operation)
+    if not ok:
+        return [(None, 0)] * len(keys)
+    return [
+        (unpack_prediction(value), max(pttl, 0) / 1000)
+        for value, pttl in zip(replies[::2], replies[1::2])
+    ]
+
+
+async def set_cached_predictions(items: dict, expiry: int = 3600):
+    """Write many key -> value pairs with one pipelined SETEX batch."""
+    if not items:
+        return
+
+    async def operation(client):
+        pipe = client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, expiry, pack_prediction(value))
+        return await pipe.execute()
+
+    with timed_stage("cache_write_redis"):
+        await guarded(operation)
+
+
+# ── Single-flight leases ──────────────────────────────────────────────────────
+
+async def acquire_leases(keys: list[str], ttl_ms: int) -> list[bool]:
+    """
+    Try to take a short lease (SET NX PX) on each cache key, in one round trip.
+    True = this worker computes the key. Without Redis every key is ours.
+    """
+    if not keys:
+        return []
+
+    async def operation(client):
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(f"lease:{key}", b"1", nx=True, px=ttl_ms)
+        return await pipe.execute()
+
+    ok, replies = await guarded(operation)
+    if not ok:
+        return [True] * len(keys)
+    return [bool(reply) for reply in replies]
+
+
+async def release_leases(keys: list[str]):
+    """Drop leases early (the computation failed) so others stop waiting."""
+    if keys:
+        await guarded(lambda client: client.delete(*(f"lease:{key}" for key in keys)))
+
+
+def schedule_cached_predictions(items: dict, expiry: int = 3600):
+    """Fire-and-forget write: the request never waits on Redis SETEX."""
+    if not items or get_client() is None or breaker.is_open:
+        return
+    # fresh context: the write finishes after the response, outside its timings
+    task = asyncio.create_task(set_cached_predictions(items, expiry), context=contextvars.Context())
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
 
 
 """
@@ -39,7 +221,7 @@ def get_cached_prediction(key: str):
     except (redis.RedisError, json.JSONDecodeError):
         return None
 
-except (redis.RedisError, json.JSONDecodeError): 
+except (redis.RedisError, json.JSONDecodeError):
 This catches any Redis-related error, for example:
 - ConnectionError
 - TimeoutError
@@ -47,4 +229,7 @@ This catches any Redis-related error, for example:
 
 then continue with out cache
 
-"""
\ No newline at end of file
+The circuit breaker above goes one step further: after a few failures in a
+row it stops calling Redis at all for a while, so a dead Redis costs
+nothing instead of one timeout per request.
+"""
@@ -0,0 +1,185 @@
+# Admission control for /predict
+#
+# 1. Per-client token buckets (429): keyed by the JWT `sub`, or by the API
+#    key when the token has none. Every worker checks its own buckets first
+#    (no I/O); with RATE_LIMIT_SHARED the request is then also charged to a
+#    bucket in Redis, so the limit holds across workers and hosts. If Redis is
+#    down (circuit breaker open) the local decision stands.
+# 2. Global load shedding (503): once too many /predict requests are in
+#    flight in this worker, or model work has recently waited too long for a
+#    threadpool thread, new requests are turned away before doing any work.
+import hashlib
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, Header, HTTPException, status
+from starlette.responses import JSONResponse
+
+from app.cache import redis_cache
+from app.core.config import settings
+from app.core.dependencies import get_current_user
+from app.core.metrics import ADMISSION_DECISIONS, PREDICT_IN_FLIGHT
+
+
+# ── Token buckets ────────────────────────────────────────────────────────────
+
+class TokenBucketLimiter:
+    """
+    `rate` tokens per second per client, up to `burst` saved up.
+    Idle buckets are full anyway, so the least recently used ones are
+    dropped beyond `max_clients`.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        """Charge `cost` tokens. Returns 0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Same algorithm in Redis, atomically (one round trip, Redis clock)
+_TAKE_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] + t[2] / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+async def take_shared(key: str, rate: float, burst: float, cost: float = 1.0):
+    """Charge the Redis bucket. Returns the wait in seconds, or None if Redis is unavailable."""
+    ok, wait = await redis_cache.guarded(
+        lambda client: client.eval(_TAKE_SCRIPT, 1, f"ratelimit:{key}", rate, burst, cost)
+    )
+    return float(wait) if ok else None
+
+
+limiter = TokenBucketLimiter(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+
+
+def client_key(user: dict, api_key: str) -> str:
+    if user.get("sub"):
+        return f"user:{user['sub']}"
+    return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def _reject_rate_limited(wait: float):
+    ADMISSION_DECISIONS.labels(decision="rejected", reason="rate_limit").inc()
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Rate limit exceeded, please slow down.",
+        headers={"Retry-After": str(max(1, round(wait + 0.5)))},
+    )
+
+
+async def enforce_rate_limit(user=Depends(get_current_user), api_key: str = Header(...)):
+    """Dependency for the /predict routes (get_current_user is resolved once per request)."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    key = client_key(user, api_key)
+    # local fast path: a client over the limit in this worker is over it everywhere
+    wait = limiter.take(key)
+    if wait > 0:
+        _reject_rate_limited(wait)
+    if settings.RATE_LIMIT_SHARED and settings.CACHE_BACKEND == 'redis':
+        wait = await take_shared(key, settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+        if wait:
+            _reject_rate_limited(wait)
+    ADMISSION_DECISIONS.labels(decision="admitted", reason="rate_limit").inc()
+
+
+# ── Load shedding ────────────────────────────────────────────────────────────
+
+class LoadShedder:
+    """
+    Tracks in-flight /predict requests and a moving average of how long model
+    work waits for a threadpool thread. The queue-wait signal only counts
+    while it is fresh, so shedding stops once the backlog has drained.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue_wait_ms: float, smoothing: float = 0.2):
+        self.max_in_flight = max_in_flight          # 0 = no limit
+        self.max_queue_wait = max_queue_wait_ms / 1000  # 0 = no limit
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.queue_wait = 0.0
+        self.queue_wait_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0 or self.max_queue_wait > 0
+
+    def observe_queue_wait(self, seconds: float):
+        # called from worker threads; a lost update only skews the average slightly
+        self.queue_wait += self.smoothing * (seconds - self.queue_wait)
+        self.queue_wait_at = time.monotonic()
+
+    def overload_reason(self):
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        if (
+            self.max_queue_wait
+            and self.queue_wait > self.max_queue_wait
+            and time.monotonic() - self.queue_wait_at < 1.0
+        ):
+            return "queue_wait"
+        return None
+
+
+shedder = LoadShedder(settings.SHED_MAX_IN_FLIGHT, settings.SHED_QUEUE_WAIT_MS)
+
+
+class LoadSheddingMiddleware:
+    """Answers 503 straight away for /predict* requests while overloaded."""
+
+    def __init__(self, app, shedder: LoadShedder = shedder):
+        self.app = app
+        self.shedder = shedder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/predict"):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.shedder.overload_reason()
+        if reason is not None:
+            ADMISSION_DECISIONS.labels(decision="rejected", reason=reason).inc()
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly."},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        ADMISSION_DECISIONS.labels(decision="admitted", reason="load").inc()
+        self.shedder.in_flight += 1
+        PREDICT_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.in_flight -= 1
+            PREDICT_IN_FLIGHT.dec()
@@ -10,8 +10,95 @@ class Settings:
     API_KEY = os.getenv('API_KEY')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     JWT_ALGORITHM = 'HS256'
+    # Already-verified JWTs are cached until their own exp (capped at this TTL)
+    TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', 10000))
+    TOKEN_CACHE_MAX_TTL_SECONDS = int(os.getenv('TOKEN_CACHE_MAX_TTL_SECONDS', 1800))
     REDIS_URL = os.getenv('REDIS_URL')
+    # 'redis', 'memory' (in-process stand-in, for benchmarks) or 'none'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'redis')
+    # Password hashing runs on its own pool; queue overflow -> 503
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 2))
+    BCRYPT_MAX_QUEUE = int(os.getenv('BCRYPT_MAX_QUEUE', 32))
+    # Pooled async Redis client: timeouts in seconds, breaker opens after N failures
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.25))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.1))
+    REDIS_BREAKER_FAILURES = int(os.getenv('REDIS_BREAKER_FAILURES', 5))
+    REDIS_BREAKER_RESET_SECONDS = float(os.getenv('REDIS_BREAKER_RESET_SECONDS', 30))
+    CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 3600))
+    # In-process LRU tier in front of Redis (0 entries disables it)
+    LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', 10000))
+    LOCAL_CACHE_MAX_BYTES = int(os.getenv('LOCAL_CACHE_MAX_BYTES', 0))
     MODEL_PATH = 'app/models/model.joblib'
+    # 'sklearn' runs the joblib Pipeline, 'compiled' uses app/services/compiled_model.py
+    INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'sklearn')
+    # Compiled artifact, optionally memory-mapped read-only
+    MODEL_ARTIFACT_PATH = os.getenv('MODEL_ARTIFACT_PATH', 'app/models/model.compiled.joblib')
+    MODEL_MMAP = os.getenv('MODEL_MMAP', 'true').lower() == 'true'
+    # Hot reload: poll MODEL_PATH every N seconds (0 = off), keep N versions for rollback
+    MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 0))
+    MODEL_KEEP_VERSIONS = int(os.getenv('MODEL_KEEP_VERSIONS', 2))
+    # Rows pushed through the model at startup before /ready reports ready
+    WARMUP_ROWS = int(os.getenv('WARMUP_ROWS', 64))
+    PREDICT_BATCH_MAX_SIZE = int(os.getenv('PREDICT_BATCH_MAX_SIZE', 1000))
+    # Identical concurrent cache misses share one computation (in this worker),
+    # and optionally across workers through a short Redis lease on the key
+    SINGLEFLIGHT_ENABLED = os.getenv('SINGLEFLIGHT_ENABLED', 'true').lower() == 'true'
+    SINGLEFLIGHT_REMOTE = os.getenv('SINGLEFLIGHT_REMOTE', 'false').lower() == 'true'
+    SINGLEFLIGHT_LEASE_MS = int(os.getenv('SINGLEFLIGHT_LEASE_MS', 1000))
+    SINGLEFLIGHT_WAIT_MS = float(os.getenv('SINGLEFLIGHT_WAIT_MS', 250))
+    SINGLEFLIGHT_POLL_MS = float(os.getenv('SINGLEFLIGHT_POLL_MS', 5))
+    # Rows scored per model.predict by the streaming POST /predict/csv
+    CSV_CHUNK_ROWS = int(os.getenv('CSV_CHUNK_ROWS', 5000))
+    # Coalesce concurrent /predict cache misses into one model.predict call
+    MICROBATCH_ENABLED = os.getenv('MICROBATCH_ENABLED', 'false').lower() == 'true'
+    MICROBATCH_MAX_SIZE = int(os.getenv('MICROBATCH_MAX_SIZE', 32))
+    MICROBATCH_MAX_WAIT_MS = float(os.getenv('MICROBATCH_MAX_WAIT_MS', 2))
+    # Per-client token buckets for /predict (keyed by JWT sub, else API key) -> 429
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'false').lower() == 'true'
+    RATE_LIMIT_PER_SECOND = float(os.getenv('RATE_LIMIT_PER_SECOND', 20))
+    RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 40))
+    # Also enforce the limit across workers/hosts through Redis (CACHE_BACKEND=redis)
+    RATE_LIMIT_SHARED = os.getenv('RATE_LIMIT_SHARED', 'false').lower() == 'true'
+    # Load shedding for /predict -> 503 (0 = off)
+    SHED_MAX_IN_FLIGHT = int(os.getenv('SHED_MAX_IN_FLIGHT', 0))
+    SHED_QUEUE_WAIT_MS = float(os.getenv('SHED_QUEUE_WAIT_MS', 0))
+    # JSON access logs; LOG_SAMPLE_RATE is the share of 2xx/3xx requests logged
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
+    # Per-stage latency breakdown in a Server-Timing response header
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    # Fill the prediction cache at startup (before /ready), within a time budget
+    CACHE_WARMUP_ON_STARTUP = os.getenv('CACHE_WARMUP_ON_STARTUP', 'false').lower() == 'true'
+    CACHE_WARMUP_SOURCES = os.getenv('CACHE_WARMUP_SOURCES', 'traffic,csv').split(',')
+    CACHE_WARMUP_LIMIT = int(os.getenv('CACHE_WARMUP_LIMIT', 5000))
+    CACHE_WARMUP_BUDGET_SECONDS = float(os.getenv('CACHE_WARMUP_BUDGET_SECONDS', 10))
+    # Constant-memory sketches of live /predict inputs and prices, merged across
+    # workers through Redis and compared with the training baseline (/admin/drift)
+    DRIFT_ENABLED = os.getenv('DRIFT_ENABLED', 'true').lower() == 'true'
+    DRIFT_SYNC_SECONDS = float(os.getenv('DRIFT_SYNC_SECONDS', 15))
+    DRIFT_WINDOW_SECONDS = float(os.getenv('DRIFT_WINDOW_SECONDS', 3600))
+    DRIFT_BASELINE_PATH = os.getenv('DRIFT_BASELINE_PATH', 'app/models/baseline_stats.json')
+    DRIFT_PSI_ALERT = float(os.getenv('DRIFT_PSI_ALERT', 0.25))
+    # Write-behind audit log of every quoted price (SQLite prediction_audit table):
+    # requests only append to a bounded queue, a background task writes batches
+    AUDIT_ENABLED = os.getenv('AUDIT_ENABLED', 'true').lower() == 'true'
+    AUDIT_QUEUE_MAX = int(os.getenv('AUDIT_QUEUE_MAX', 50000))
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 1000))
+    AUDIT_FLUSH_SECONDS = float(os.getenv('AUDIT_FLUSH_SECONDS', 1.0))
+    # The table shares the user DB file: delete records older than this (0 = keep all)
+    AUDIT_RETENTION_DAYS = float(os.getenv('AUDIT_RETENTION_DAYS', 30))
+    # Opt-in cProfile of selected requests (x-profile: 1 + api-key header, or sampled);
+    # the middleware is not installed at all unless PROFILING_ENABLED
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_KEEP_FILES = int(os.getenv('PROFILE_KEEP_FILES', 200))
+    # Opt-in capture of /predict payloads for benchmark replay
+    CAPTURE_REQUESTS = os.getenv('CAPTURE_REQUESTS', 'false').lower() == 'true'
+    CAPTURE_PATH = os.getenv('CAPTURE_PATH', 'requests.jsonl')
+    CAPTURE_SAMPLE_RATE = float(os.getenv('CAPTURE_SAMPLE_RATE', 1.0))
     ENV = os.getenv('ENV', 'development')
 
     def validate(self):
@@ -19,6 +106,18 @@ class Settings:
             raise RuntimeError("API_KEY is not set")
         if not self.JWT_SECRET_KEY:
             raise RuntimeError("JWT_SECRET_KEY is not set")
+        if self.CACHE_BACKEND not in ('redis', 'memory', 'none'):
+            raise RuntimeError("CACHE_BACKEND must be 'redis', 'memory' or 'none'")
+        if self.INFERENCE_ENGINE not in ('sklearn', 'compiled'):
+            raise RuntimeError("INFERENCE_ENGINE must be 'sklearn' or 'compiled'")
+        if self.RATE_LIMIT_ENABLED and self.RATE_LIMIT_PER_SECOND <= 0:
+            raise RuntimeError("RATE_LIMIT_PER_SECOND must be positive")
+        if self.RATE_LIMIT_SHARED and self.CACHE_BACKEND != 'redis':
+            raise RuntimeError("RATE_LIMIT_SHARED needs CACHE_BACKEND=redis")
+        if self.AUDIT_ENABLED and self.AUDIT_BATCH_SIZE <= 0:
+            raise RuntimeError("AUDIT_BATCH_SIZE must be positive")
+        if self.AUDIT_RETENTION_DAYS < 0:
+            raise RuntimeError("AUDIT_RETENTION_DAYS must be 0 (keep all) or positive")
 
 settings = Settings()
 settings.validate()
\ No newline at end of file
@@ -1,17 +1,22 @@
 # Dependency injection logic for API key and JWT token validation
+import hmac
 from fastapi import Header, HTTPException, status
 from app.core.config import settings
 from app.core.security import verify_token
 
 # Verify api key
 def verify_api_key(api_key: str = Header(...)):
-    if api_key != settings.API_KEY:
+    # constant-time compare, so the key can't be guessed byte by byte from timings
+    # (not timed: it's well under a µs, less than recording it would cost)
+    if not hmac.compare_digest(api_key.encode(), settings.API_KEY.encode()):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail='Invalid API_KEY!'
         )
     
 # Verify and get the user
+# verify_token skips jwt.decode for tokens it has already verified
+# (and records the auth_jwt stage itself)
 def get_current_user(token: str = Header(...)):
     payload = verify_token(token)
     if not payload:
@@ -0,0 +1,165 @@
+# App-level Prometheus metrics
+# Registered on the default registry, so they show up on the existing /metrics
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# ── Inference stages ─────────────────────────────────────────────────────────
+
+STAGE_LATENCY = Histogram(
+    "prediction_stage_seconds",
+    "Time spent per request stage (auth, cache tiers, preprocessing, model)",
+    ["stage", "model_version"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+MODEL_INFO = Gauge(
+    "prediction_model_info",
+    "1 for the model version currently serving predictions",
+    ["model_version"],
+)
+
+model_version = "unknown"
+
+# Per-request stage durations, read by ServerTimingMiddleware.
+# Holds a dict while a request is in flight, None elsewhere.
+request_timings: ContextVar = ContextVar("request_timings", default=None)
+
+
+def set_model_version(version: str):
+    global model_version
+    if model_version != "unknown":
+        MODEL_INFO.labels(model_version=model_version).set(0)
+    model_version = version
+    MODEL_INFO.labels(model_version=version).set(1)
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_LATENCY.labels(stage=stage, model_version=model_version).observe(seconds)
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def note_stage(stage: str, seconds: float):
+    """Server-Timing only, no histogram: for stages too cheap to be worth an observe."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+# ── Micro-batching ───────────────────────────────────────────────────────────
+
+MICROBATCH_SIZE = Histogram(
+    "prediction_microbatch_size",
+    "Rows per coalesced model.predict call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+MICROBATCH_QUEUE_DELAY = Histogram(
+    "prediction_microbatch_queue_seconds",
+    "Time a prediction waited in the coalescer before its batch ran",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+# ── Single-flight ────────────────────────────────────────────────────────────
+
+SINGLEFLIGHT_SAVED = Counter(
+    "prediction_singleflight_saved_total",
+    "Model computations skipped because an identical one was already running "
+    "(scope=local: this worker, remote: another worker)",
+    ["scope"],
+)
+
+SINGLEFLIGHT_TIMEOUTS = Counter(
+    "prediction_singleflight_timeouts_total",
+    "Keys computed anyway after waiting SINGLEFLIGHT_WAIT_MS for another worker",
+)
+
+# ── Prediction cache ─────────────────────────────────────────────────────────
+
+CACHE_REQUESTS = Counter(
+    "prediction_cache_requests_total",
+    "Prediction cache lookups by tier and result",
+    ["tier", "result"],
+)
+
+CACHE_EVICTIONS = Counter(
+    "prediction_cache_evictions_total",
+    "Entries dropped from an in-process cache tier",
+    ["tier", "reason"],
+)
+
+REDIS_CIRCUIT_OPEN = Gauge(
+    "redis_circuit_open",
+    "1 while the Redis circuit breaker is skipping calls",
+)
+
+
+# ── Admission control ────────────────────────────────────────────────────────
+
+ADMISSION_DECISIONS = Counter(
+    "admission_requests_total",
+    "/predict requests admitted or rejected, by check (rate_limit, load, in_flight, queue_wait)",
+    ["decision", "reason"],
+)
+
+PREDICT_IN_FLIGHT = Gauge(
+    "predict_requests_in_flight",
+    "/predict requests currently being served by this worker",
+)
+
+
+# ── Traffic drift ────────────────────────────────────────────────────────────
+# Merged over all workers (app/services/drift.py), so any worker's scrape
+# shows the whole deployment
+
+TRAFFIC_QUANTILE = Gauge(
+    "traffic_feature_quantile",
+    "Quantiles of live request features and predicted price (current window)",
+    ["feature", "quantile"],
+)
+
+TRAFFIC_CATEGORY_SHARE = Gauge(
+    "traffic_category_share",
+    "Share of live requests per category (current window)",
+    ["feature", "category"],
+)
+
+TRAFFIC_PSI = Gauge(
+    "traffic_feature_psi",
+    "Population stability index of live traffic against the training baseline",
+    ["feature"],
+)
+
+
+# ── Prediction audit log ─────────────────────────────────────────────────────
+
+AUDIT_RECORDS = Counter(
+    "prediction_audit_records_total",
+    "Quoted prices by audit outcome (queued, written, dropped when the queue is full, failed, pruned)",
+    ["outcome"],
+)
+
+AUDIT_QUEUE_DEPTH = Gauge(
+    "prediction_audit_queue_depth",
+    "Audit records waiting to be written by this worker",
+)
+
+AUDIT_FLUSH_SECONDS = Histogram(
+    "prediction_audit_flush_seconds",
+    "Time to write one batch of audit records (one transaction)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
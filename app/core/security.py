@@ -1,23 +1,81 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from jose import jwt, JWTError
 import bcrypt
 from app.core.config import settings
+from app.core.metrics import note_stage, timed_stage
+from app.cache.local_cache import LocalCache
 from fastapi import HTTPException, status
 
 
 # ── Password helpers ──────────────────────────────────────────────────────────
 
 def hash_password(plain: str) -> str:
-    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(plain.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+def password_needs_rehash(hashed: str) -> bool:
+    """True when the hash was made with a different cost than BCRYPT_ROUNDS."""
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt on its own small thread pool (bcrypt releases the GIL).
+
+    Login/signup storms queue here instead of on the shared anyio threadpool
+    that /predict uses. Once `workers + max_queue` jobs are in flight, new
+    ones are rejected with 503 straight away.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in requests, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+
+hasher_pool = PasswordHasherPool(settings.BCRYPT_WORKERS, settings.BCRYPT_MAX_QUEUE)
+
+
+async def hash_password_async(plain: str) -> str:
+    return await hasher_pool.run(hash_password, plain)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await hasher_pool.run(verify_password, plain, hashed)
+
+
 # ── JWT helpers ───────────────────────────────────────────────────────────────
 
+# jose is imported inside the helpers to keep app import (cold start) light
+
 def create_token(data: dict, expire_minutes: int = 30) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=expire_minutes)
     to_encode.update({"exp": expire})
@@ -28,16 +86,40 @@ def create_token(data: dict, expire_minutes: int = 30) -> str:
     )
 
 
+# Tokens that already passed jwt.decode, keyed by their SHA-256 digest.
+# Each entry expires at the token's own `exp`, so a cached token is never
+# accepted for longer than jwt.decode would accept it.
+token_cache = LocalCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.TOKEN_CACHE_MAX_TTL_SECONDS,
+    name="token",
+)
+
+
 def verify_token(token: str) -> dict:
+    start = time.perf_counter()
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        # a couple of µs: a histogram observe would cost more than the check itself
+        note_stage("auth_jwt", time.perf_counter() - start)
+        return dict(payload)
+
+    from jose import jwt, JWTError
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM],
-        )
-        return payload
+        with timed_stage("auth_jwt"):
+            payload = jwt.decode(
+                token,
+                settings.JWT_SECRET_KEY,
+                algorithms=[settings.JWT_ALGORITHM],
+            )
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or Expired Token!",
-        )
\ No newline at end of file
+        )
+
+    exp = payload.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else settings.TOKEN_CACHE_MAX_TTL_SECONDS
+    token_cache.set(digest, payload, ttl=ttl)
+    return dict(payload)
\ No newline at end of file
@@ -1,55 +1,143 @@
+import asyncio
 import sqlite3
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 DB_PATH = os.getenv("DB_PATH", "app/db/users.db")
+DB_WORKERS = int(os.getenv("DB_WORKERS", 4))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+
+# One reusable connection per thread (sqlite3 connections are not thread-safe)
+_local = threading.local()
+
+# Async wrappers run on this small pool, so the number of open connections
+# stays at DB_WORKERS and the event loop never waits on the database file.
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="sqlite")
 
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # access columns by name
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row  # access columns by name
+        # WAL lets readers and the writer work at the same time;
+        # synchronous=NORMAL is safe in WAL mode and skips an fsync per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        _local.conn = conn
     return conn
 
 
+async def run_db(fn, *args):
+    """Run a blocking DB helper on the DB pool and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, fn, *args)
+
+
 def init_db():
-    """Create the users table if it doesn't exist."""
+    """Create the users and prediction_audit tables if they don't exist."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = get_connection()
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id        INTEGER PRIMARY KEY AUTOINCREMENT,
-            email     TEXT    UNIQUE NOT NULL,
-            password  TEXT    NOT NULL,
-            created_at TEXT   DEFAULT (datetime('now'))
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                email     TEXT    UNIQUE NOT NULL,
+                password  TEXT    NOT NULL,
+                created_at TEXT   DEFAULT (datetime('now'))
+            )
+        """)
+        # Every quoted price (app/services/audit.py); append-only
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS prediction_audit (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                quoted_at     REAL    NOT NULL,
+                model_version TEXT    NOT NULL,
+                features      TEXT    NOT NULL,
+                price         REAL    NOT NULL
+            )
+        """)
+        # for the retention deletes (AUDIT_RETENTION_DAYS)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_prediction_audit_quoted_at ON prediction_audit (quoted_at)")
 
 
 # ── User helpers ────────────────────────────────────────────────────────────
 
-def create_user(email: str, hashed_password: str):
+def create_user(email: str, hashed_password: str) -> bool:
+    """
+    Insert a user in one statement. Returns False if the email is taken
+    (the UNIQUE constraint does the check, no SELECT first).
+    """
     conn = get_connection()
     try:
+        with conn:
+            conn.execute(
+                "INSERT INTO users (email, password) VALUES (?, ?)",
+                (email, hashed_password)
+            )
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+
+def update_user_password(email: str, hashed_password: str):
+    conn = get_connection()
+    with conn:
         conn.execute(
-            "INSERT INTO users (email, password) VALUES (?, ?)",
-            (email, hashed_password)
+            "UPDATE users SET password = ? WHERE email = ?",
+            (hashed_password, email)
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def get_user_by_email(email: str):
+    # only the columns login needs
+    row = get_connection().execute(
+        "SELECT email, password FROM users WHERE email = ?", (email,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+# ── Audit helpers ───────────────────────────────────────────────────────────
+
+def insert_audit_records(records: list[tuple]):
+    """Bulk insert (quoted_at, model_version, features_json, price) rows in one transaction."""
     conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT * FROM users WHERE email = ?", (email,)
-        ).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+    with conn:
+        conn.executemany(
+            "INSERT INTO prediction_audit (quoted_at, model_version, features, price) VALUES (?, ?, ?, ?)",
+            records
+        )
+
+
+def delete_audit_records_before(cutoff: float, batch_size: int = 10000) -> int:
+    """
+    Delete audit rows quoted before `cutoff` (unix time). Small transactions,
+    so signups and logins never wait long behind the write lock.
+    """
+    conn = get_connection()
+    deleted = 0
+    while True:
+        with conn:
+            count = conn.execute(
+                "DELETE FROM prediction_audit WHERE id IN "
+                "(SELECT id FROM prediction_audit WHERE quoted_at < ? LIMIT ?)",
+                (cutoff, batch_size)
+            ).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+# ── Async wrappers ──────────────────────────────────────────────────────────
+
+async def create_user_async(email: str, hashed_password: str) -> bool:
+    return await run_db(create_user, email, hashed_password)
+
+
+async def update_user_password_async(email: str, hashed_password: str):
+    await run_db(update_user_password, email, hashed_password)
 
 
-def email_exists(email: str) -> bool:
-    return get_user_by_email(email) is not None
\ No newline at end of file
+async def get_user_by_email_async(email: str):
+    return await run_db(get_user_by_email, email)
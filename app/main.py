@@ -1,29 +1,113 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
+from starlette.concurrency import run_in_threadpool
 
-from app.api import routes_auth, routes_predict
+from app.api import routes_admin, routes_auth, routes_health, routes_predict
+from app.core.admission import LoadSheddingMiddleware, shedder
+from app.middleware.capture_middleware import CaptureMiddleware, start_capture, stop_capture
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
 from app.core.exceptions import register_exception_handlers
 from app.core.config import settings
+from app.core.security import create_token, verify_token
 from app.db.database import init_db
+from app.cache.redis_cache import close_client
+from app.services import audit, drift, model_service
+from app.services.model_registry import registry
+from app.utils.logger import setup_logging, shutdown_logging, get_logger
+
+logger = get_logger("app.startup")
+
+
+def warm_up_code_paths():
+    """Exercise the model and JWT code paths once."""
+    model_service.warm_up()
+    verify_token(create_token({"sub": "warmup"}))
+
 
-app = FastAPI(title="Car Price Prediction API")
+async def warm_up():
+    """Everything that has to happen before /ready reports ready."""
+    if settings.CACHE_WARMUP_ON_STARTUP:
+        from app.services.cache_warmup import warm_cache_from_sources
+        await warm_cache_from_sources(
+            settings.CACHE_WARMUP_SOURCES,
+            settings.CACHE_WARMUP_LIMIT,
+            settings.CACHE_WARMUP_BUDGET_SECONDS,
+        )
+    # sets model_service.warmed_up, so it goes last
+    await run_in_threadpool(warm_up_code_paths)
 
-# Initialise SQLite DB on startup
-@app.on_event("startup")
-def on_startup():
+
+def log_warmup_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("warm-up failed", exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging(settings.LOG_LEVEL)
+    if settings.CAPTURE_REQUESTS:
+        start_capture(settings.CAPTURE_PATH)
+    # Initialise SQLite DB on startup
     init_db()
+    # Load the model once; the server starts accepting requests after this
+    await run_in_threadpool(model_service.load_model)
+    # Warm-up runs in the background, /ready answers 503 until it is done
+    warmup_task = asyncio.create_task(warm_up())
+    warmup_task.add_done_callback(log_warmup_failure)
+    # Hot reload: swap in a retrained MODEL_PATH without a restart
+    watch_task = None
+    if settings.MODEL_WATCH_INTERVAL > 0:
+        watch_task = asyncio.create_task(
+            registry.watch(settings.MODEL_PATH, settings.MODEL_WATCH_INTERVAL)
+        )
+    # Background writer for the prediction audit log
+    if audit.sink is not None:
+        audit.sink.start()
+    # Publish/merge traffic sketches across workers
+    drift_task = asyncio.create_task(drift.sync_loop()) if drift.traffic is not None else None
+    yield
+    if watch_task is not None:
+        watch_task.cancel()
+    if drift_task is not None:
+        drift_task.cancel()
+    # Write the audit records still queued (DB pool is still up)
+    if audit.sink is not None:
+        await audit.sink.stop()
+    # Flush pending cache writes and close the Redis pool
+    await close_client()
+    stop_capture()
+    shutdown_logging()
+
+
+# orjson renders every JSON response (faster than the stdlib encoder)
+app = FastAPI(title="Car Price Prediction API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
-# Middleware
+# Middleware (the last one added runs first)
+if shedder.enabled:
+    app.add_middleware(LoadSheddingMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if settings.CAPTURE_REQUESTS:
+    app.add_middleware(CaptureMiddleware)
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
 app.add_middleware(LoggingMiddleware)
 
 # Routes
 app.include_router(routes_auth.router, tags=["Authorization"])
 app.include_router(routes_predict.router, tags=["Prediction"])
+app.include_router(routes_health.router, tags=["Health"])
+app.include_router(routes_admin.router, tags=["Admin"])
 
 # Monitoring
 if settings.ENV != "test":
     Instrumentator().instrument(app).expose(app)
 
 # Exception handlers
-register_exception_handlers(app)
\ No newline at end of file
+register_exception_handlers(app)
@@ -0,0 +1,82 @@
+# Opt-in capture of real /predict payloads for benchmark replay
+# (CAPTURE_REQUESTS=true). Only the JSON body and path are recorded, never
+# headers, so tokens and API keys don't end up in the file. Lines are written
+# to CAPTURE_PATH by a background QueueListener, off the request path.
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+
+from app.core.config import settings
+from app.utils.serialization import loads_body
+
+CAPTURED_PATHS = ("/predict", "/predict/batch")
+
+_listener = None
+_capture_logger = logging.getLogger("app.capture")
+
+
+def start_capture(path: str):
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    _capture_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    _capture_logger.setLevel(logging.INFO)
+    _capture_logger.propagate = False  # keep payloads out of the access log
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+
+
+def stop_capture():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class CaptureMiddleware:
+    def __init__(self, app, sample_rate: float = None):
+        self.app = app
+        self.sample_rate = settings.CAPTURE_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in CAPTURED_PATHS
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        status_code = None
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive_wrapper, send_wrapper)
+
+        # only replayable payloads: the request was valid and got answered.
+        # /predict/batch bodies may be msgpack; they are stored as JSON like the rest
+        if status_code == 200:
+            content_type = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1")
+            try:
+                body = loads_body(b"".join(chunks), content_type)
+            except ValueError:
+                return
+            _capture_logger.info(json.dumps({"ts": time.time(), "path": scope["path"], "body": body}))
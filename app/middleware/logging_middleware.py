@@ -1,22 +1,47 @@
 # Logs all incomming requests and outgoing responces
-import time
+# Pure ASGI middleware: no BaseHTTPMiddleware task / stream wrapper per request
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware # Base class
+import random
+import time
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger("app.access")
+
+
+class LoggingMiddleware:
+    def __init__(self, app, sample_rate: float = None):
+        self.app = app
+        # share of successful requests that get logged; errors are always logged
+        self.sample_rate = settings.LOG_SAMPLE_RATE if sample_rate is None else sample_rate
 
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # display - check method and endpoint
-        logging.info(f"Request: {request.method} {request.url}")
+        start = time.perf_counter_ns()
+        status_code = 500  # if the app raises before responding
 
-        # Display time taken for response
-        start_time = time.time()
-        response = await call_next(request) # Hit the endpoint
-        process_time = time.time() - start_time
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-        logging.info(
-            f"Response: {response.status_code} | "
-            f"Time: {process_time:.3f}s"
-            )
-        
-        return response
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status_code >= 400 or random.random() < self.sample_rate:
+                # Display time taken for response
+                logger.log(
+                    logging.WARNING if status_code >= 500 else logging.INFO,
+                    "request",
+                    extra={"fields": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": (time.perf_counter_ns() - start) / 1e6,
+                    }},
+                )
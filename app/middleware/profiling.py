@@ -0,0 +1,68 @@
+# Opt-in request profiler (PROFILING_ENABLED=true; not installed otherwise)
+#
+# A request is profiled when it sends `x-profile: 1` together with a valid
+# api-key header, or at random with probability PROFILE_SAMPLE_RATE. Only one
+# request per worker is profiled at a time (cProfile is per thread, and
+# coroutines of concurrent requests on the loop thread show up in it too).
+# The saved file name comes back in the `x-profile-id` response header.
+import asyncio
+import cProfile
+import hmac
+import os
+import random
+import time
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+from app.utils.profiling import prune, save_profile, thread_profiles
+
+logger = get_logger("app.profiling")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate: float = None, directory: str = None):
+        self.app = app
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.directory = directory or settings.PROFILE_DIR
+        self.busy = False
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _requested(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") in (b"1", b"true"):
+            api_key = headers.get(b"api-key", b"")
+            return hmac.compare_digest(api_key, settings.API_KEY.encode())
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.busy or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{time.time():.6f}-{os.getpid()}-{scope['path'].strip('/').replace('/', '_') or 'root'}.prof"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        self.busy = True
+        extra = []
+        token = thread_profiles.set(extra)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            thread_profiles.reset(token)
+            self.busy = False
+            try:
+                await asyncio.to_thread(self._save, profile, extra, name)
+            except Exception:
+                logger.warning("could not save profile", exc_info=True)
+
+    def _save(self, profile, extra, name):
+        save_profile(profile, extra, os.path.join(self.directory, name))
+        prune(self.directory, settings.PROFILE_KEEP_FILES)
@@ -0,0 +1,32 @@
+# Adds a Server-Timing header with the per-stage breakdown of the request
+# e.g. Server-Timing: auth_jwt;dur=0.031, cache_local;dur=0.004, model;dur=2.713
+from app.core.metrics import request_timings
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = request_timings.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and timings:
+                value = ", ".join(
+                    f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings.items()
+                )
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", value.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_timings.reset(token)
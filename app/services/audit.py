@@ -0,0 +1,123 @@
+# Write-behind audit log of every quoted price (AUDIT_ENABLED)
+#
+# predict_car_prices hands each (features, price) to the sink, which only
+# appends to a bounded in-memory queue: the request never waits on disk. A
+# background task writes the queue to SQLite (prediction_audit table, one
+# executemany per transaction) as soon as AUDIT_BATCH_SIZE records are
+# waiting, or every AUDIT_FLUSH_SECONDS otherwise. When the database can't
+# keep up and the queue reaches AUDIT_QUEUE_MAX, new records are dropped and
+# counted instead of slowing requests down. On shutdown the queue is flushed.
+#
+# The table lives in the user DB file and grows by one row (~0.3 KB) per quoted
+# price; records older than AUDIT_RETENTION_DAYS are deleted once an hour.
+import asyncio
+import time
+from collections import deque
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import AUDIT_FLUSH_SECONDS, AUDIT_QUEUE_DEPTH, AUDIT_RECORDS
+from app.db.database import delete_audit_records_before, insert_audit_records, run_db
+from app.utils.logger import get_logger
+
+logger = get_logger("app.audit")
+
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def _write(batch: list[tuple]):
+    # runs on the DB pool: JSON encoding happens here, not on the request path
+    insert_audit_records([
+        (quoted_at, version, orjson.dumps(features).decode(), price)
+        for quoted_at, version, features, price in batch
+    ])
+
+
+class AuditSink:
+    def __init__(self, max_queue: int, batch_size: int, flush_seconds: float, retention_days: float = 0):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.retention_days = retention_days  # 0: keep forever
+        self._pruned_at = 0.0
+        self.pending = deque()
+        self._full = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    def record(self, version: str, rows: list[dict], results: list[dict]):
+        """Queue one record per row; drops (and counts) what doesn't fit."""
+        quoted_at = time.time()
+        room = max(self.max_queue - len(self.pending), 0)
+        for row, result in zip(rows[:room], results):
+            self.pending.append((quoted_at, version, row, result["prediction"]))
+        queued = min(len(rows), room)
+        if queued:
+            AUDIT_RECORDS.labels(outcome="queued").inc(queued)
+        if queued < len(rows):
+            AUDIT_RECORDS.labels(outcome="dropped").inc(len(rows) - queued)
+        if len(self.pending) >= self.batch_size:
+            self._full.set()
+
+    async def flush(self):
+        """Write everything queued so far, one transaction per batch."""
+        while self.pending:
+            batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+            AUDIT_QUEUE_DEPTH.set(len(self.pending))
+            start = time.perf_counter()
+            try:
+                await run_db(_write, batch)
+            except Exception:
+                AUDIT_RECORDS.labels(outcome="failed").inc(len(batch))
+                logger.warning("could not write %d audit records", len(batch), exc_info=True)
+                continue
+            AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - start)
+            AUDIT_RECORDS.labels(outcome="written").inc(len(batch))
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            AUDIT_QUEUE_DEPTH.set(len(self.pending))
+            await self.flush()
+            await self.prune()
+
+    async def prune(self):
+        """Delete records past the retention window (at most once per PRUNE_INTERVAL_SECONDS)."""
+        now = time.time()
+        if self.retention_days <= 0 or now - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = now
+        try:
+            deleted = await run_db(delete_audit_records_before, now - self.retention_days * 86400)
+        except Exception:
+            logger.warning("could not prune audit records", exc_info=True)
+            return
+        if deleted:
+            AUDIT_RECORDS.labels(outcome="pruned").inc(deleted)
+            logger.info("pruned audit records", extra={"fields": {"deleted": deleted}})
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still queued."""
+        self._closing = True
+        self._full.set()  # wake it up now rather than at the next tick
+        if self._task is not None:
+            await self._task  # finishes its current flush, never cut mid-write
+            self._task = None
+        await self.flush()
+
+
+sink = AuditSink(
+    settings.AUDIT_QUEUE_MAX,
+    settings.AUDIT_BATCH_SIZE,
+    settings.AUDIT_FLUSH_SECONDS,
+    settings.AUDIT_RETENTION_DAYS,
+) if settings.AUDIT_ENABLED else None
@@ -0,0 +1,135 @@
+# Pre-warm the prediction cache after a deploy or a Redis flush
+#
+#   python -m app.services.cache_warmup [--source csv traffic] [--limit 5000] [--budget 60]
+#
+# Payloads come from the training CSV and/or the most frequent recorded
+# /predict bodies (requests.jsonl). They are normalised through CarFeatures,
+# keyed with the exact make_cache_key used by predict_car_price, predicted in
+# chunks and written back with one pipelined write per chunk.
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.api.routes_predict import CarFeatures
+from app.cache.prediction_cache import get_cached_predictions, set_cached_predictions
+from app.core.config import settings
+from app.services.model_registry import registry
+from app.services.model_service import make_cache_key, predict_rows
+from app.utils.logger import get_logger
+
+logger = get_logger("app.cache_warmup")
+
+
+def normalise(row: dict):
+    """Same types as a validated request body, so the cache key matches."""
+    try:
+        return CarFeatures(**row).model_dump()
+    except ValidationError:
+        return None
+
+
+def payloads_from_csv(path: str = None, limit: int = None) -> list[dict]:
+    from training.train_utils import DATA_FILE_PATH, TARGET, load_dataset
+
+    df = load_dataset(path or DATA_FILE_PATH).drop(columns=[TARGET]).dropna()
+    payloads = [p for p in map(normalise, df.to_dict(orient="records")) if p]
+    return payloads[:limit] if limit else payloads
+
+
+def payloads_from_traffic(path: str, limit: int = None) -> list[dict]:
+    """Most frequent /predict bodies recorded by CaptureMiddleware, most popular first."""
+    if not os.path.exists(path):
+        return []
+    counts, bodies = Counter(), {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                body = json.loads(line).get("body")
+            except (ValueError, AttributeError):
+                continue
+            for row in body if isinstance(body, list) else [body]:
+                payload = normalise(row) if isinstance(row, dict) else None
+                if payload:
+                    key = json.dumps(payload, sort_keys=True)
+                    counts[key] += 1
+                    bodies[key] = payload
+    return [bodies[key] for key, _ in counts.most_common(limit)]
+
+
+def collect_payloads(sources: list[str], limit: int = None) -> list[dict]:
+    # recorded traffic first: those are the configurations people actually ask for
+    payloads = []
+    if "traffic" in sources:
+        payloads += payloads_from_traffic(settings.CAPTURE_PATH, limit)
+    if "csv" in sources:
+        payloads += payloads_from_csv(limit=limit)
+    return payloads[:limit] if limit else payloads
+
+
+async def warm_cache(payloads: list[dict], budget_seconds: float = None, chunk_size: int = 500) -> dict:
+    """Predict and cache every payload not already cached, within the time budget."""
+    start = time.monotonic()
+    loaded = registry.active
+    unique = {make_cache_key(p, loaded.version): p for p in payloads}
+    keys = list(unique)
+    stats = {"payloads": len(unique), "already_cached": 0, "computed": 0, "failed": 0, "truncated": False}
+
+    for i in range(0, len(keys), chunk_size):
+        if budget_seconds is not None and time.monotonic() - start > budget_seconds:
+            stats["truncated"] = True
+            break
+        chunk = keys[i:i + chunk_size]
+        cached = await get_cached_predictions(chunk)
+        missing = [key for key, value in zip(chunk, cached) if not value]
+        stats["already_cached"] += len(chunk) - len(missing)
+        if not missing:
+            continue
+        try:
+            predictions = await run_in_threadpool(predict_rows, [unique[k] for k in missing], loaded)
+        except Exception:
+            stats["failed"] += len(missing)
+            logger.warning("cache warm-up chunk failed", exc_info=True)
+            continue
+        set_cached_predictions({
+            key: {"prediction": float(prediction)} for key, prediction in zip(missing, predictions)
+        })
+        stats["computed"] += len(missing)
+
+    stats["seconds"] = round(time.monotonic() - start, 3)
+    logger.info("cache warm-up done", extra={"fields": stats})
+    return stats
+
+
+async def warm_cache_from_sources(sources: list[str], limit: int = None, budget_seconds: float = None) -> dict:
+    payloads = await run_in_threadpool(collect_payloads, sources, limit)
+    return await warm_cache(payloads, budget_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the prediction cache.")
+    parser.add_argument("--source", nargs="+", default=["csv", "traffic"], choices=["csv", "traffic"])
+    parser.add_argument("--limit", type=int, default=settings.CACHE_WARMUP_LIMIT)
+    parser.add_argument("--budget", type=float, default=None, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    from app.cache.redis_cache import close_client
+    from app.services import model_service
+
+    async def run():
+        model_service.load_model()
+        try:
+            return await warm_cache_from_sources(args.source, args.limit, args.budget)
+        finally:
+            await close_client()  # waits for the pipelined writes
+
+    print(json.dumps(asyncio.run(run())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# Compiled inference engine for the trained Pipeline
+#
+# The sklearn Pipeline (ColumnTransformer -> GradientBoostingRegressor) is
+# turned into plain NumPy data once, at load time:
+#   - imputers + scalers   -> one fill value, offset and scale per column
+#   - OneHot / Ordinal     -> dict lookups (category -> output position / code)
+#   - KBinsDiscretizer     -> bin edges for np.searchsorted
+#   - 200 trees            -> one set of contiguous node arrays
+# Rows are evaluated straight from python dicts, no DataFrame is built.
+#
+# The compiled arrays can be saved as an uncompressed joblib artifact and
+# loaded with mmap_mode='r'. The trees are small (~28 MB PSS per worker vs
+# ~130 MB for the sklearn Pipeline, see benchmarks/worker_rss.py), so mmap
+# saves next to nothing: the memory win comes from the compiled engine itself.
+#
+#   python -m app.services.compiled_model build [model.joblib] [artifact]
+import os
+import sys
+
+import joblib
+import numpy as np
+
+from app.utils.files import file_hash
+
+TREE_LEAF = -1
+ARTIFACT_FORMAT = 1
+
+
+class CompiledModel:
+    """Array-only copy of the Preprocessing + GradientBoosting pipeline."""
+
+    def __init__(self):
+        self.n_outputs = 0
+        # numeric columns: (input column, output position, fill, offset, scale)
+        self.num_columns = []
+        self.num_out = None
+        self.num_fill = None
+        self.num_offset = None
+        self.num_scale = None
+        # one-hot columns: (input column, {category: output position or -1})
+        self.onehot = []
+        # ordinal columns: (input column, output position, {category: code})
+        self.ordinal = []
+        # binned columns: (input column, output position, inner bin edges)
+        self.kbins = []
+        # flattened trees
+        self.feature = None
+        self.threshold = None
+        self.left = None
+        self.right = None
+        self.value = None
+        self.roots = None
+        self.max_depth = 0
+        self.learning_rate = 0.0
+        self.init_value = 0.0
+        # content hash of the model.joblib this was compiled from
+        self.source_version = None
+
+    # ── Build ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CompiledModel":
+        """Compile a fitted Pipeline. Raises TypeError for steps it can't handle."""
+        preprocessor = pipeline.steps[0][1]
+        regressor = pipeline.steps[-1][1]
+
+        compiled = cls()
+        compiled._compile_preprocessor(preprocessor)
+        compiled._compile_trees(regressor)
+        return compiled
+
+    def _compile_preprocessor(self, preprocessor):
+        # sklearn is only needed to compile, not to load a saved artifact
+        from sklearn.impute import SimpleImputer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import (
+            KBinsDiscretizer,
+            OneHotEncoder,
+            OrdinalEncoder,
+            StandardScaler,
+        )
+
+        num_columns, num_fill, num_offset, num_scale, num_out = [], [], [], [], []
+        position = 0
+
+        for name, transformer, columns in preprocessor.transformers_:
+            if isinstance(transformer, str) and transformer == "drop":
+                continue
+
+            steps = transformer.steps if isinstance(transformer, Pipeline) else [(name, transformer)]
+            kinds = [type(step) for _, step in steps]
+
+            if kinds in ([SimpleImputer, StandardScaler], [SimpleImputer], [StandardScaler]):
+                fill = np.full(len(columns), np.nan)
+                offset = np.zeros(len(columns))
+                scale = np.ones(len(columns))
+                for _, step in steps:
+                    if isinstance(step, SimpleImputer):
+                        if step.add_indicator:
+                            raise TypeError("SimpleImputer(add_indicator=True) is not supported")
+                        fill = step.statistics_.astype(float)
+                    else:
+                        if step.with_mean:
+                            offset = step.mean_.astype(float)
+                        if step.with_std:
+                            scale = step.scale_.astype(float)
+                for j, column in enumerate(columns):
+                    num_columns.append(column)
+                    num_out.append(position)
+                    num_fill.append(fill[j])
+                    num_offset.append(offset[j])
+                    num_scale.append(scale[j])
+                    position += 1
+
+            elif kinds == [OneHotEncoder]:
+                encoder = steps[0][1]
+                if getattr(encoder, "_infrequent_enabled", False):
+                    raise TypeError("OneHotEncoder with infrequent categories is not supported")
+                drop_idx = encoder.drop_idx_
+                for j, column in enumerate(columns):
+                    lookup = {}
+                    dropped = None if drop_idx is None else drop_idx[j]
+                    for k, category in enumerate(encoder.categories_[j]):
+                        if dropped is not None and k == dropped:
+                            lookup[category] = -1
+                        else:
+                            lookup[category] = position
+                            position += 1
+                    self.onehot.append((column, lookup))
+
+            elif kinds == [OrdinalEncoder]:
+                encoder = steps[0][1]
+                for j, column in enumerate(columns):
+                    lookup = {category: float(k) for k, category in enumerate(encoder.categories_[j])}
+                    self.ordinal.append((column, position, lookup))
+                    position += 1
+
+            elif kinds == [KBinsDiscretizer]:
+                binner = steps[0][1]
+                if binner.encode != "ordinal":
+                    raise TypeError("KBinsDiscretizer is only supported with encode='ordinal'")
+                for j, column in enumerate(columns):
+                    self.kbins.append((column, position, np.asarray(binner.bin_edges_[j][1:-1], dtype=float)))
+                    position += 1
+
+            else:
+                raise TypeError(f"Cannot compile transformer {name!r}: {kinds}")
+
+        self.num_columns = num_columns
+        self.num_out = np.asarray(num_out, dtype=np.intp)
+        self.num_fill = np.asarray(num_fill, dtype=float)
+        self.num_offset = np.asarray(num_offset, dtype=float)
+        self.num_scale = np.asarray(num_scale, dtype=float)
+        self.n_outputs = position
+
+    def _compile_trees(self, regressor):
+        from sklearn.dummy import DummyRegressor
+
+        init = regressor.init_
+        if init == "zero":
+            self.init_value = 0.0
+        elif isinstance(init, DummyRegressor):
+            self.init_value = float(np.ravel(init.constant_)[0])
+        else:
+            raise TypeError(f"Cannot compile init estimator {type(init).__name__}")
+
+        if regressor.estimators_.shape[1] != 1:
+            raise TypeError("Only single-output regressors can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in regressor.estimators_[:, 0]:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            index = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == TREE_LEAF
+
+            # Leaves point at themselves so every tree can be walked max_depth times
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, index, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.learning_rate = float(regressor.learning_rate)
+
+    # ── Artifact ─────────────────────────────────────────────────────────────
+
+    def save(self, path: str):
+        """
+        Write an uncompressed joblib artifact (arrays stay mmap-able).
+        Written to a temp file and renamed, so workers never see half a file.
+        """
+        state = dict(self.__dict__, format=ARTIFACT_FORMAT)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(state, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompiledModel":
+        """Load an artifact; with mmap=True the node arrays are read-only shared pages."""
+        state = joblib.load(path, mmap_mode="r" if mmap else None)
+        if state.pop("format", None) != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a compiled model artifact (format {ARTIFACT_FORMAT})")
+        compiled = cls()
+        compiled.__dict__.update(state)
+        return compiled
+
+    # ── Inference ────────────────────────────────────────────────────────────
+
+    def transform(self, rows: list[dict]) -> np.ndarray:
+        """Encode dict rows into the float32 matrix the trees expect."""
+        n_rows = len(rows)
+        X = np.zeros((n_rows, self.n_outputs), dtype=np.float64)
+
+        if self.num_columns:
+            # None -> nan, then impute and scale in one shot
+            raw = np.array(
+                [[row.get(column) for column in self.num_columns] for row in rows],
+                dtype=np.float64,
+            ).reshape(n_rows, len(self.num_columns))
+            raw = np.where(np.isnan(raw), self.num_fill, raw)
+            X[:, self.num_out] = (raw - self.num_offset) / self.num_scale
+
+        for i, row in enumerate(rows):
+            for column, lookup in self.onehot:
+                position = _lookup(lookup, row.get(column), column)
+                if position >= 0:
+                    X[i, position] = 1.0
+            for column, position, lookup in self.ordinal:
+                X[i, position] = _lookup(lookup, row.get(column), column)
+
+        for column, position, edges in self.kbins:
+            values = np.array([row.get(column) for row in rows], dtype=np.float64)
+            if np.isnan(values).any():
+                # KBinsDiscretizer has no imputer in front of it and rejects NaN too
+                raise ValueError(f"Input contains NaN in column {column!r}")
+            X[:, position] = np.searchsorted(edges, values, side="right")
+
+        # sklearn trees compare float32 features against their thresholds
+        return X.astype(np.float32)
+
+    def predict_transformed(self, X: np.ndarray) -> np.ndarray:
+        """Walk all trees for all rows at once, one tree level per step."""
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.init_value + self.learning_rate * self.value[node].sum(axis=1)
+
+    def predict(self, rows: list[dict]) -> np.ndarray:
+        if not rows:
+            return np.empty(0, dtype=np.float64)
+        return self.predict_transformed(self.transform(rows))
+
+
+def _lookup(lookup: dict, value, column: str):
+    try:
+        return lookup[value]
+    except KeyError:
+        # Same behaviour as the fitted encoders (handle_unknown='error')
+        raise ValueError(f"Found unknown category {value!r} in column {column!r}") from None
+
+
+def build_artifact(model_path: str, artifact_path: str) -> "CompiledModel":
+    """Compile model.joblib and write the mmap-able artifact next to it."""
+    compiled = CompiledModel.from_pipeline(joblib.load(model_path))
+    compiled.source_version = file_hash(model_path)
+    compiled.save(artifact_path)
+    return compiled
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        sys.exit("usage: python -m app.services.compiled_model build [model.joblib] [artifact]")
+    from training.train_utils import MODEL_PATH
+
+    model_path = sys.argv[2] if len(sys.argv) > 2 else MODEL_PATH
+    artifact_path = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(model_path)[0] + ".compiled.joblib"
+    compiled = build_artifact(model_path, artifact_path)
+    print(f"wrote {artifact_path} ({compiled.value.shape[0]} tree nodes, version {compiled.source_version})")
@@ -0,0 +1,161 @@
+# Score CSV files shaped like data/car-details.csv, chunk by chunk
+#
+# Only one chunk of rows (CSV_CHUNK_ROWS) is held in memory at a time:
+# lines are read off the input, parsed, scored with one vectorized
+# model.predict, written out and dropped before the next chunk is read.
+# Used by POST /predict/csv; extra columns (name, selling_price, ...) are
+# passed through untouched and `predicted_price` / `error` are appended.
+import codecs
+import csv
+import io
+
+from starlette.concurrency import run_in_threadpool
+
+# Model inputs and how to read them from CSV text (same fields as CarFeatures)
+FEATURE_TYPES = {
+    "company": str, "year": lambda v: int(float(v)), "owner": str, "fuel": str,
+    "seller_type": str, "transmission": str, "km_driven": float,
+    "mileage_mpg": float, "engine_cc": float, "max_power_bhp": float,
+    "torque_nm": float, "seats": float,
+}
+# Missing numeric values are left to the model (SimpleImputer / num_fill);
+# only a missing category is an error
+CATEGORICAL_COLUMNS = {column for column, cast in FEATURE_TYPES.items() if cast is str}
+OUTPUT_COLUMNS = ["predicted_price", "error"]
+# A "line" longer than this is not a car; stop instead of buffering it
+MAX_LINE_BYTES = 64 * 1024
+
+
+def missing_columns(header: list[str]) -> list[str]:
+    return [column for column in FEATURE_TYPES if column not in header]
+
+
+async def iter_lines(chunks):
+    """
+    Decode an async stream of byte chunks into CSV records, one string each
+    (BOM and line-ending \\r stripped). A quoted field may span lines
+    (RFC 4180): physical lines are joined until the record's quotes balance,
+    so csv.reader later sees the whole record.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""  # text after the last newline
+    record = ""  # a record whose quoted field continues on the next line
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            record += line
+            if record.count('"') % 2:
+                record += "\n"  # newline inside a quoted field
+                continue
+            yield record.rstrip("\r")
+            record = ""
+        if len(record) + len(buffer) > MAX_LINE_BYTES:
+            raise ValueError("CSV line too long")
+    record += buffer + decoder.decode(b"", final=True)
+    if record.count('"') % 2:
+        raise ValueError("CSV ends inside a quoted field")
+    if record.strip():
+        yield record.rstrip("\r")
+
+
+async def iter_chunks(lines, size: int):
+    """Group an async line iterator into lists of at most `size` non-empty lines."""
+    chunk = []
+    async for line in lines:
+        if line.strip():
+            chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def to_features(record: dict) -> dict:
+    """
+    One CSV (or DataFrame) record -> model input.
+    Empty numeric values become NaN (imputed by the model); raises
+    ValueError/KeyError on bad values and empty categories.
+    """
+    features = {}
+    for column, cast in FEATURE_TYPES.items():
+        value = record[column]
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "" or value != value:  # value != value: NaN
+            if column in CATEGORICAL_COLUMNS:
+                raise ValueError(f"{column} is empty")
+            features[column] = float("nan")
+            continue
+        features[column] = cast(value)
+    return features
+
+
+def score_records(loaded, records: list[dict]) -> list[tuple]:
+    """
+    Predict a chunk of CSV records with one model.predict.
+    Returns (price, error) per record; bad rows get an error, not a failed chunk.
+    """
+    # Training grouped rare companies as 'Others' (train_utils.load_dataset)
+    companies = loaded.categories("company")
+    others = "Others" in companies
+
+    results = [None] * len(records)
+    valid, rows = [], []
+    for i, record in enumerate(records):
+        try:
+            features = to_features(record)
+        except (KeyError, TypeError, ValueError) as exc:
+            results[i] = (None, f"invalid row: {exc}")
+            continue
+        if others and features["company"] not in companies:
+            features["company"] = "Others"
+        valid.append(i)
+        rows.append(features)
+
+    if rows:
+        try:
+            predictions = loaded.predict(rows)
+        except ValueError:
+            # e.g. an unknown fuel type: score row by row to find it
+            predictions = []
+            for row in rows:
+                try:
+                    predictions.append(loaded.predict([row])[0])
+                except ValueError as exc:
+                    predictions.append(exc)
+        for i, prediction in zip(valid, predictions):
+            if isinstance(prediction, Exception):
+                results[i] = (None, f"prediction failed: {prediction}")
+            else:
+                results[i] = (float(prediction), "")
+    return results
+
+
+def format_rows(rows: list[list[str]], results: list[tuple]) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for row, (price, error) in zip(rows, results):
+        writer.writerow(row + ["" if price is None else f"{price:.2f}", error])
+    return out.getvalue()
+
+
+def score_chunk(loaded, header: list[str], lines: list[str]) -> str:
+    """Parse, score and format one chunk of CSV records (runs in a worker thread)."""
+    rows = list(csv.reader(lines))
+    records = [dict(zip(header, row)) for row in rows]
+    return format_rows(rows, score_records(loaded, records))
+
+
+async def score_csv_stream(header: list[str], lines, loaded, chunk_size: int):
+    """
+    Async generator of output CSV text: the header first, then one block per
+    scored chunk. `lines` is the rest of the input (after the header).
+    """
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(header + OUTPUT_COLUMNS)
+    yield out.getvalue()
+
+    async for chunk in iter_chunks(lines, chunk_size):
+        yield await run_in_threadpool(score_chunk, loaded, header, chunk)
@@ -0,0 +1,218 @@
+# Live traffic statistics for drift monitoring, in constant memory
+#
+# Every /predict and /predict/batch row updates fixed-size sketches in this
+# worker: a quantile sketch per numeric feature and for the predicted price,
+# and counts per category. No payload is stored. Every DRIFT_SYNC_SECONDS
+# each worker publishes its sketches to Redis (one hash field per worker)
+# and merges everyone's, so the Prometheus gauges and /admin/drift show the
+# whole deployment whichever worker answers. Statistics cover the current
+# window (DRIFT_WINDOW_SECONDS); after that each worker starts over.
+#
+# The baseline is written by `python -m training.train_model` from the
+# training set (training/train_utils.py: BASELINE_PATH).
+import asyncio
+import json
+import os
+import socket
+import time
+
+import orjson
+
+from app.cache import redis_cache
+from app.core.config import settings
+from app.core.metrics import TRAFFIC_CATEGORY_SHARE, TRAFFIC_PSI, TRAFFIC_QUANTILE
+from app.utils.logger import get_logger
+from app.utils.sketches import CategoryCounts, QuantileSketch, psi
+from training.train_utils import (
+    CATEGORICAL_FEATURES, DEFAULT_SKETCH_ACCURACY, NUMERIC_FEATURES, PRICE_FEATURE, QUANTILES, SKETCH_ACCURACY,
+)
+
+logger = get_logger("app.drift")
+
+WORKERS_KEY = "drift:workers"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TrafficStats:
+    def __init__(self):
+        self.numeric = {
+            name: QuantileSketch(SKETCH_ACCURACY.get(name, DEFAULT_SKETCH_ACCURACY))
+            for name in NUMERIC_FEATURES + [PRICE_FEATURE]
+        }
+        self.categorical = {name: CategoryCounts() for name in CATEGORICAL_FEATURES}
+        self.started_at = time.time()
+
+    @property
+    def rows(self) -> int:
+        return self.numeric[PRICE_FEATURE].count
+
+    def observe(self, rows: list[dict], results: list[dict]):
+        """Hot path: a few dict increments per feature, no allocation per row."""
+        numeric = [(name, self.numeric[name]) for name in NUMERIC_FEATURES]
+        categorical = [(name, self.categorical[name]) for name in CATEGORICAL_FEATURES]
+        price = self.numeric[PRICE_FEATURE]
+        for row, result in zip(rows, results):
+            for name, sketch in numeric:
+                sketch.add(row[name])
+            for name, counts in categorical:
+                counts.add(row[name])
+            price.add(result["prediction"])
+
+    def merge(self, other: "TrafficStats"):
+        for name, sketch in other.numeric.items():
+            self.numeric[name].merge(sketch)
+        for name, counts in other.categorical.items():
+            self.categorical[name].merge(counts)
+        self.started_at = min(self.started_at, other.started_at)
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "numeric": {name: sketch.to_dict() for name, sketch in self.numeric.items()},
+            "categorical": {name: counts.to_dict() for name, counts in self.categorical.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrafficStats":
+        stats = cls()
+        stats.started_at = data["started_at"]
+        for name, sketch in data["numeric"].items():
+            if name in stats.numeric:
+                stats.numeric[name] = QuantileSketch.from_dict(sketch)
+        for name, counts in data["categorical"].items():
+            if name in stats.categorical:
+                stats.categorical[name] = CategoryCounts.from_dict(counts)
+        return stats
+
+
+# This worker's statistics (None when DRIFT_ENABLED is off)
+traffic = TrafficStats() if settings.DRIFT_ENABLED else None
+# Latest merged view of all workers, refreshed by sync()
+merged = None
+
+
+# ── Cross-worker merge ───────────────────────────────────────────────────────
+
+async def sync():
+    """Publish this worker's sketches, then merge every live worker's."""
+    global traffic, merged
+    now = time.time()
+    snapshot = orjson.dumps({"updated_at": now, "stats": traffic.to_dict()}, option=orjson.OPT_NON_STR_KEYS)
+    ok, _ = await redis_cache.guarded(lambda client: client.hset(WORKERS_KEY, WORKER_ID, snapshot))
+    ok, workers = await redis_cache.guarded(lambda client: client.hgetall(WORKERS_KEY)) if ok else (False, None)
+
+    view = TrafficStats.from_dict(traffic.to_dict())
+    stale = []
+    for worker, raw in (workers or {}).items():
+        worker = worker.decode() if isinstance(worker, bytes) else worker
+        if worker == WORKER_ID:
+            continue
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            continue
+        if now - data["updated_at"] > 3 * settings.DRIFT_SYNC_SECONDS:
+            stale.append(worker)  # worker is gone
+            continue
+        view.merge(TrafficStats.from_dict(data["stats"]))
+    if stale:
+        await redis_cache.guarded(lambda client: client.hdel(WORKERS_KEY, *stale))
+
+    merged = view
+    update_gauges(compare(view, load_baseline()))
+
+    if now - traffic.started_at > settings.DRIFT_WINDOW_SECONDS:
+        traffic = TrafficStats()
+
+
+async def sync_loop():
+    while True:
+        await asyncio.sleep(settings.DRIFT_SYNC_SECONDS)
+        try:
+            await sync()
+        except Exception:
+            logger.warning("drift sync failed", exc_info=True)
+
+
+# ── Baseline comparison ──────────────────────────────────────────────────────
+
+_baseline = (None, None)  # (mtime, data)
+
+
+def load_baseline():
+    """Training-set baseline, re-read when the file changes (e.g. after retraining)."""
+    global _baseline
+    try:
+        mtime = os.path.getmtime(settings.DRIFT_BASELINE_PATH)
+    except OSError:
+        return None
+    if _baseline[0] != mtime:
+        with open(settings.DRIFT_BASELINE_PATH, encoding="utf-8") as f:
+            _baseline = (mtime, json.load(f))
+    return _baseline[1]
+
+
+def _live_shares(sketch: QuantileSketch, edges: list[float]) -> list[float]:
+    # share of values in each baseline bin: (-inf, e0], (e0, e1], ..., (ek, inf)
+    ranks = [sketch.rank(edge) for edge in edges]
+    return [b - a for a, b in zip([0.0] + ranks, ranks + [1.0])]
+
+
+def compare(stats: TrafficStats, baseline: dict = None) -> dict:
+    """Live quantiles / category shares, side by side with the baseline, plus PSI."""
+    report = {
+        "window_started_at": stats.started_at,
+        "rows": stats.rows,
+        "baseline_rows": baseline["rows"] if baseline else None,
+        "numeric": {},
+        "categorical": {},
+    }
+    for name, sketch in stats.numeric.items():
+        entry = {
+            "live": {str(q): sketch.quantile(q) for q in QUANTILES},
+            "live_mean": sketch.mean,
+        }
+        base = baseline["numeric"].get(name) if baseline else None
+        if base:
+            entry["baseline"] = base["quantiles"]
+            entry["baseline_mean"] = base["mean"]
+            if sketch.count:
+                live = dict(enumerate(_live_shares(sketch, base["edges"])))
+                entry["psi"] = psi(dict(enumerate(base["shares"])), live)
+        report["numeric"][name] = entry
+
+    for name, counts in stats.categorical.items():
+        entry = {"live": counts.shares()}
+        base = baseline["categorical"].get(name) if baseline else None
+        if base:
+            entry["baseline"] = base
+            if counts.count:
+                entry["psi"] = psi(base, entry["live"])
+        report["categorical"][name] = entry
+
+    report["drifted"] = sorted(
+        name
+        for section in ("numeric", "categorical")
+        for name, entry in report[section].items()
+        if entry.get("psi", 0.0) > settings.DRIFT_PSI_ALERT
+    )
+    return report
+
+
+def update_gauges(report: dict):
+    for name, entry in report["numeric"].items():
+        for q, value in entry["live"].items():
+            if value is not None:
+                TRAFFIC_QUANTILE.labels(feature=name, quantile=q).set(value)
+        if "psi" in entry:
+            TRAFFIC_PSI.labels(feature=name).set(entry["psi"])
+    for name, entry in report["categorical"].items():
+        for category, share in entry["live"].items():
+            TRAFFIC_CATEGORY_SHARE.labels(feature=name, category=category).set(share)
+        if "psi" in entry:
+            TRAFFIC_PSI.labels(feature=name).set(entry["psi"])
+
+
+def report() -> dict:
+    """Latest merged view vs the baseline (this worker only until the first sync)."""
+    return compare(merged or traffic, load_baseline())
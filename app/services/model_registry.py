@@ -0,0 +1,230 @@
+# Model registry: loads model versions, warms them up and swaps them in
+#
+# A version is the content hash of its model.joblib. Loading and warm-up
+# happen off the request path; switching versions is a single reference
+# assignment, so requests already running keep the model they started with
+# and new requests get the new one. Nothing is dropped.
+import asyncio
+import os
+import threading
+import time
+
+from app.core.config import settings
+from app.core.metrics import set_model_version, timed_stage
+from app.utils.files import file_hash
+from app.utils.logger import get_logger
+
+logger = get_logger("app.models")
+
+# Representative row used to exercise the prediction code paths
+WARMUP_ROW = {
+    "company": "Maruti", "year": 2016, "owner": "First", "fuel": "Petrol",
+    "seller_type": "Individual", "transmission": "Manual", "km_driven": 50000.0,
+    "mileage_mpg": 20.0, "engine_cc": 1197.0, "max_power_bhp": 82.0,
+    "torque_nm": 113.0, "seats": 5.0,
+}
+
+
+class LoadedModel:
+    """One loaded model version, with the configured inference engine."""
+
+    def __init__(self, version: str, path: str, pipeline=None, compiled=None):
+        self.version = version
+        self.path = path
+        self.pipeline = pipeline   # sklearn Pipeline (INFERENCE_ENGINE=sklearn)
+        self.compiled = compiled   # CompiledModel (INFERENCE_ENGINE=compiled)
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_path(cls, path: str, version: str = None) -> "LoadedModel":
+        # pass the version when the caller already hashed the file, so the
+        # version always describes the bytes that were hashed
+        version = version or file_hash(path)
+        if settings.INFERENCE_ENGINE == 'compiled':
+            try:
+                return cls(version, path, compiled=load_compiled(path, version))
+            except (TypeError, OSError):
+                # TypeError: e.g. a HistGradientBoosting model from `train_model --search`;
+                # OSError: the artifact can't be written (read-only image or volume)
+                logger.warning("model can't be compiled, using sklearn",
+                               extra={"fields": {"model_version": version}}, exc_info=True)
+        import joblib
+        return cls(version, path, pipeline=joblib.load(path))
+
+    def predict(self, rows: list[dict]):
+        """Run the model on dict rows."""
+        if self.compiled is not None:
+            with timed_stage("preprocess"):
+                X = self.compiled.transform(rows)
+            with timed_stage("model"):
+                return self.compiled.predict_transformed(X)
+
+        import pandas as pd
+
+        # our model is trained on dataframe so converting to df
+        with timed_stage("preprocess"):
+            input_data = pd.DataFrame(rows)
+        with timed_stage("model"):
+            return self.pipeline.predict(input_data)
+
+    def warm_up(self, n_rows: int = None):
+        """
+        Run a single-row and a batch prediction so the first real requests
+        don't pay for sklearn/numpy's lazily initialised code paths.
+        """
+        n_rows = settings.WARMUP_ROWS if n_rows is None else n_rows
+        self.predict([WARMUP_ROW])
+        if n_rows > 1:
+            self.predict([dict(WARMUP_ROW, km_driven=1000.0 * i) for i in range(n_rows)])
+
+    def categories(self, column: str) -> set:
+        """Categories the model was fitted on for an encoded column (empty if not encoded)."""
+        if self.compiled is not None:
+            for name, lookup in self.compiled.onehot:
+                if name == column:
+                    return set(lookup)
+            for name, _, lookup in self.compiled.ordinal:
+                if name == column:
+                    return set(lookup)
+            return set()
+
+        preprocessor = self.pipeline.steps[0][1]
+        for _, transformer, columns in preprocessor.transformers_:
+            encoder = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+            if column in list(columns) and hasattr(encoder, "categories_"):
+                return set(encoder.categories_[list(columns).index(column)])
+        return set()
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "engine": "compiled" if self.compiled is not None else "sklearn",
+            "loaded_at": self.loaded_at,
+        }
+
+
+def artifact_path_for(path: str) -> str:
+    """Where the compiled, mmap-able artifact for a model file lives."""
+    if os.path.abspath(path) == os.path.abspath(settings.MODEL_PATH):
+        return settings.MODEL_ARTIFACT_PATH
+    return os.path.splitext(path)[0] + ".compiled.joblib"
+
+
+def load_compiled(path: str, version: str):
+    """
+    Load the compiled artifact (memory-mapped with MODEL_MMAP). The artifact
+    is (re)built from the model file when it is missing or was compiled from
+    another version; on a read-only volume that raises OSError, so ship it
+    prebuilt (`python -m app.services.compiled_model build`).
+    """
+    from app.services.compiled_model import CompiledModel, build_artifact
+
+    artifact = artifact_path_for(path)
+    if os.path.exists(artifact):
+        compiled = CompiledModel.load(artifact, mmap=settings.MODEL_MMAP)
+        if compiled.source_version == version:
+            return compiled
+
+    build_artifact(path, artifact)
+    return CompiledModel.load(artifact, mmap=settings.MODEL_MMAP)
+
+
+class ModelRegistry:
+    """Keeps the active model plus a few recent versions for quick rollback."""
+
+    def __init__(self, keep_versions: int):
+        self.keep_versions = max(keep_versions, 1)
+        self.active = None
+        self.versions = {}  # version -> LoadedModel, oldest first
+        self._lock = threading.Lock()  # serialises loads, not reads
+
+    def load(self, path: str, warm: bool = True) -> LoadedModel:
+        """Load (and warm up) a model file. Blocking; call from a thread."""
+        with self._lock:
+            version = file_hash(path)
+            loaded = self.versions.get(version)
+            if loaded is None:
+                loaded = LoadedModel.from_path(path, version)
+                if warm:
+                    loaded.warm_up()
+                self.versions[version] = loaded
+                # the new version isn't active yet: keep it, it is about to be
+                self._trim(keep=version)
+            return loaded
+
+    def activate(self, version: str) -> LoadedModel:
+        loaded = self.versions.get(version)
+        if loaded is None:
+            raise KeyError(version)
+        if self.active is None or self.active.version != version:
+            self.active = loaded  # atomic swap
+            set_model_version(version)
+            logger.info("model activated", extra={"fields": {"model_version": version}})
+            with self._lock:
+                self._trim()
+        return loaded
+
+    def load_and_activate(self, path: str, warm: bool = True) -> LoadedModel:
+        return self.activate(self.load(path, warm).version)
+
+    def _trim(self, keep: str = None):
+        # Drop the oldest versions beyond keep_versions, never the active one
+        # nor `keep` (just loaded); so there can briefly be one extra
+        protected = {keep, self.active.version if self.active else None}
+        for version in list(self.versions):
+            if len(self.versions) <= self.keep_versions:
+                break
+            if version not in protected:
+                del self.versions[version]
+
+    def available(self) -> list[dict]:
+        """Model files in the model directory that could be loaded."""
+        model_dir = os.path.dirname(settings.MODEL_PATH) or "."
+        files = []
+        for name in sorted(os.listdir(model_dir)):
+            if name.endswith(".joblib") and not name.endswith(".compiled.joblib"):
+                path = os.path.join(model_dir, name)
+                files.append({"path": path, "modified_at": os.path.getmtime(path)})
+        return files
+
+    def describe(self) -> dict:
+        return {
+            "active": self.active.version if self.active else None,
+            "loaded": [m.describe() for m in self.versions.values()],
+            "available": self.available(),
+        }
+
+    async def watch(self, path: str, interval: float):
+        """
+        Poll a model file and hot-swap it when it changes. A change is only
+        picked up once the file has looked the same for two polls in a row,
+        so a half-written file is never loaded.
+        """
+        last_seen = _stat(path)
+        candidate = None
+        while True:
+            await asyncio.sleep(interval)
+            current = _stat(path)
+            if current is None or current == last_seen:
+                candidate = None
+                continue
+            if current != candidate:
+                candidate = current  # wait one more poll for the write to settle
+                continue
+            try:
+                await asyncio.to_thread(self.load_and_activate, path)
+            except Exception:
+                logger.exception("model reload failed", extra={"fields": {"path": path}})
+            last_seen, candidate = current, None
+
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+registry = ModelRegistry(keep_versions=settings.MODEL_KEEP_VERSIONS)
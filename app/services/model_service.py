@@ -1,41 +1,319 @@
 # Load the ML Model and Make the prediction with Redis Cashing
-import joblib
+# Models are loaded, warmed up and hot-swapped by app/services/model_registry.py;
+# joblib / pandas / sklearn are only imported when the first model loads.
+import asyncio
+import contextvars
 import hashlib
-import json
-import pandas as pd
+import time
+import orjson
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.cache.redis_cache import set_cached_prediction, get_cached_prediction
+from app.core.metrics import (
+    MICROBATCH_SIZE, MICROBATCH_QUEUE_DELAY, SINGLEFLIGHT_SAVED, SINGLEFLIGHT_TIMEOUTS, timed_stage,
+)
+from app.cache import redis_cache
+from app.cache.prediction_cache import set_cached_predictions, get_cached_predictions
+from app.core.admission import shedder
+from app.services import audit, drift
+from app.services.model_registry import registry
+from app.utils.profiling import profile_call
 
-model = joblib.load(settings.MODEL_PATH)
+# Set once warm_up() has run; reported by /ready
+warmed_up = False
 
-# We get the data from user in json and convert it to python dict
-# So data: dict
-def predict_car_price(data: dict):
+
+def is_loaded() -> bool:
+    return registry.active is not None
+
+
+def active_version():
+    return registry.active.version if registry.active else None
+
+
+def load_model():
+    """Load and activate MODEL_PATH once per worker. Idempotent."""
+    if not is_loaded():
+        # startup warm-up runs separately, in the background (see warm_up)
+        registry.load_and_activate(settings.MODEL_PATH, warm=False)
+
+
+def warm_up(n_rows: int = None):
+    """Warm up the startup model; hot-swapped versions are warmed by the registry."""
+    global warmed_up
+    registry.active.warm_up(n_rows)
+    warmed_up = True
+
+
+def predict_rows(rows: list[dict], loaded=None):
+    """Run `loaded` (default: the active model) on dict rows."""
+    return (loaded or registry.active).predict(rows)
+
+
+def _predict_in_thread(enqueued_at: float, rows: list[dict], loaded):
+    shedder.observe_queue_wait(time.perf_counter() - enqueued_at)
+    # runs under cProfile only inside a profiled request (PROFILING_ENABLED)
+    return profile_call(predict_rows, rows, loaded)
+
+
+async def run_predict(rows: list[dict], loaded=None):
+    """predict_rows on the threadpool, reporting how long it waited for a thread."""
+    return await run_in_threadpool(_predict_in_thread, time.perf_counter(), rows, loaded)
+
+
+# Bumped from JSON text values to 8-byte binary values (app/utils/serialization.py)
+CACHE_FORMAT = "b1"
+
+
+def make_cache_key(data: dict, version: str) -> str:
     """
     # comibe the values of features as key
     # json.dumps - convert data to json string
     # sort-keys - use sorted to avoid mismatch values
 
     cache_key = json.dumps(data, sort_keys=True)
+
+    Keys are prefixed with the model version (content hash), so after a
+    model swap old predictions are never served; they just expire.
+    CACHE_FORMAT changes whenever the key or value encoding does.
     """
-    # Best practice
-    cache_key = hashlib.sha256(
-        json.dumps(data, sort_keys= True).encode()
+    # Best practice (orjson: same sorted keys, ~10x faster than json.dumps)
+    digest = hashlib.sha256(
+        orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
     ).hexdigest()
-    
-
-
-    cached = get_cached_prediction(cache_key)
-    if cached:
-        return cached
-    
-    # our model is trained on dataframe so converting to df
-    input_data = pd.DataFrame([data])
-    prediction = model.predict(input_data)[0] # for getting a scaler val
-    
-    #set the cache
-    # Convert to dict format 
-    result = {"prediction": float(prediction)}
-    set_cached_prediction(cache_key, result)
-
-    return result
+    return f"{CACHE_FORMAT}:{version}:{digest}"
+
+
+# ── Micro-batching ───────────────────────────────────────────────────────────
+
+class PredictionBatcher:
+    """
+    Collects concurrent single-row predictions and runs them as one model.predict.
+
+    A batch is flushed when it reaches max_batch_size or when the oldest
+    request has waited max_wait_ms, whichever comes first. Each caller
+    awaits its own future.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []  # (loaded model, data, future, enqueued_at)
+        self._timer = None
+        self._tasks = set()  # keep running flushes referenced
+
+    async def predict(self, loaded, data: dict) -> float:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((loaded, data, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, []
+        # Requests that started before a model swap keep their own version
+        batches = {}
+        for item in pending:
+            batches.setdefault(item[0].version, []).append(item)
+        for batch in batches.values():
+            self._start(batch)
+
+    def _start(self, batch: list):
+        # fresh context: the batch's stages aren't charged to whichever request flushed it
+        task = asyncio.create_task(self._run(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        started = time.perf_counter()
+        for _, _, _, enqueued_at in batch:
+            MICROBATCH_QUEUE_DELAY.observe(started - enqueued_at)
+        MICROBATCH_SIZE.observe(len(batch))
+
+        loaded = batch[0][0]
+        rows = [data for _, data, _, _ in batch]
+        try:
+            predictions = await run_predict(rows, loaded)
+        except Exception as exc:
+            if len(batch) == 1:
+                future = batch[0][2]
+                if not future.done():
+                    future.set_exception(exc)
+                return
+            # One bad row (e.g. unknown category) must not fail its neighbours
+            for item in batch:
+                self._start([item])
+            return
+
+        for (_, _, future, _), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(float(prediction))
+
+
+batcher = None
+if settings.MICROBATCH_ENABLED:
+    batcher = PredictionBatcher(settings.MICROBATCH_MAX_SIZE, settings.MICROBATCH_MAX_WAIT_MS)
+
+
+# ── Prediction ───────────────────────────────────────────────────────────────
+
+def _find_missing(keys: list[str], rows: list[dict], results: list) -> dict:
+    # Only the misses go to the model (dedupe identical rows in the batch)
+    missing = {}
+    for key, data, cached in zip(keys, rows, results):
+        if not cached and key not in missing:
+            missing[key] = data
+    return missing
+
+
+async def _compute(loaded, missing: dict) -> dict:
+    """
+    Run the model on cache misses and cache the results.
+    Small miss sets go through the micro-batcher when it is enabled.
+    """
+    if batcher is None or len(missing) >= batcher.max_batch_size:
+        predictions = await run_predict(list(missing.values()), loaded)
+    else:
+        # queue wait + the shared batch's run time, as seen by this request
+        with timed_stage("microbatch"):
+            predictions = await asyncio.gather(
+                *(batcher.predict(loaded, data) for data in missing.values())
+            )
+    # Convert to dict format
+    fresh = {
+        key: {"prediction": float(prediction)}
+        for key, prediction in zip(missing, predictions)
+    }
+    set_cached_predictions(fresh)
+    return fresh
+
+
+# ── Single-flight ────────────────────────────────────────────────────────────
+#
+# A popular listing can arrive many times at once. In this process, identical
+# cache misses share one computation (a future per key). Across workers
+# (SINGLEFLIGHT_REMOTE), the first one to take a short Redis lease on the key
+# computes it and the others poll the cache for its result, up to
+# SINGLEFLIGHT_WAIT_MS, before computing it themselves.
+
+_in_flight = {}  # cache key -> asyncio.Future of {"prediction": float}
+
+
+async def _wait_for_remote(keys: list[str]) -> dict:
+    """Poll Redis for results other workers are computing; returns those that showed up."""
+    found = {}
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_MS / 1000
+    pending = keys
+    while pending and time.monotonic() < deadline:
+        await asyncio.sleep(settings.SINGLEFLIGHT_POLL_MS / 1000)
+        values = await redis_cache.get_cached_predictions(pending)
+        found.update((key, value) for key, value in zip(pending, values) if value)
+        pending = [key for key in pending if key not in found]
+    return found
+
+
+async def _compute_leased(loaded, missing: dict) -> dict:
+    """_compute for the keys this worker holds the lease on; wait for the rest."""
+    if not settings.SINGLEFLIGHT_REMOTE:
+        return await _compute(loaded, missing)
+
+    leased = await redis_cache.acquire_leases(list(missing), settings.SINGLEFLIGHT_LEASE_MS)
+    own = {key: data for (key, data), ok in zip(missing.items(), leased) if ok}
+    waiting = [key for key in missing if key not in own]
+
+    results = {}
+    if own:
+        try:
+            results.update(await _compute(loaded, own))
+        except Exception:
+            await redis_cache.release_leases(list(own))
+            raise
+    if waiting:
+        found = await _wait_for_remote(waiting)
+        SINGLEFLIGHT_SAVED.labels(scope="remote").inc(len(found))
+        late = {key: missing[key] for key in waiting if key not in found}
+        if late:
+            SINGLEFLIGHT_TIMEOUTS.inc(len(late))
+            found.update(await _compute(loaded, late))
+        results.update(found)
+    return results
+
+
+async def _single_flight(loaded, missing: dict) -> dict:
+    """Predictions for `missing`, computing only keys nobody else is computing."""
+    shared = {key: _in_flight[key] for key in missing if key in _in_flight}
+    own = {key: data for key, data in missing.items() if key not in shared}
+    if shared:
+        SINGLEFLIGHT_SAVED.labels(scope="local").inc(len(shared))
+
+    loop = asyncio.get_running_loop()
+    futures = {key: loop.create_future() for key in own}
+    _in_flight.update(futures)
+    results = {}
+    try:
+        if own:
+            results = await _compute_leased(loaded, own)
+            for key, future in futures.items():
+                future.set_result(results[key])
+    except Exception as exc:
+        for future in futures.values():
+            future.set_exception(exc)
+            future.exception()  # mark retrieved: nobody may be waiting on it
+        raise
+    finally:
+        for key, future in futures.items():
+            future.cancel()  # no-op unless we were cancelled ourselves
+            if _in_flight.get(key) is future:
+                del _in_flight[key]
+
+    for key, future in shared.items():
+        try:
+            results[key] = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # this request was cancelled
+            # the request computing it went away: compute it here instead
+            results.update(await _single_flight(loaded, {key: missing[key]}))
+    return results
+
+
+# We get the data from user in json and convert it to python dict
+# So data: dict
+async def predict_car_price(data: dict):
+    # Single row is just a batch of one, so both routes share the cache
+    return (await predict_car_prices([data]))[0]
+
+
+async def predict_car_prices(rows: list[dict]) -> list[dict]:
+    """
+    Predict many cars at once: one cache lookup, one model.predict for the
+    misses, one pipelined (fire-and-forget) cache write. Misses already being
+    computed (here or, with SINGLEFLIGHT_REMOTE, in another worker) are
+    awaited instead of recomputed.
+    """
+    # Pin the model for the whole request, even if a swap happens meanwhile
+    loaded = registry.active
+    keys = [make_cache_key(data, loaded.version) for data in rows]
+    results = await get_cached_predictions(keys)
+
+    missing = _find_missing(keys, rows, results)
+    if missing:
+        if settings.SINGLEFLIGHT_ENABLED:
+            fresh = await _single_flight(loaded, missing)
+        else:
+            fresh = await _compute(loaded, missing)
+        results = [cached or fresh[key] for key, cached in zip(keys, results)]
+
+    if drift.traffic is not None:
+        drift.traffic.observe(rows, results)
+    if audit.sink is not None:
+        audit.sink.record(loaded.version, rows, results)
+    return results
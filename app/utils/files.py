@@ -0,0 +1,10 @@
+import hashlib
+
+
+def file_hash(path: str, length: int = 12) -> str:
+    """Short SHA-256 content hash of a file (used as the model version)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
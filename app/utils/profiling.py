@@ -0,0 +1,113 @@
+# cProfile helpers for the opt-in request profiler (PROFILING_ENABLED)
+#
+# A profiled request runs under cProfile on the event-loop thread; model work
+# it sends to the threadpool is profiled in that thread too (profile_call)
+# and merged in. Each request is saved as a .prof file (pstats format) in
+# PROFILE_DIR; the admin endpoints aggregate them as pstats text or as
+# collapsed stacks ("a;b;c 1234" lines, for flamegraph.pl / speedscope).
+import cProfile
+import glob
+import io
+import os
+import pstats
+from contextvars import ContextVar
+
+# Profiles of the worker-thread calls made by the request being profiled.
+# None outside profiled requests, so the check costs one ContextVar.get.
+thread_profiles: ContextVar = ContextVar("thread_profiles", default=None)
+
+
+def profile_call(fn, *args):
+    """Call fn(*args), under cProfile if the current request is being profiled."""
+    profiles = thread_profiles.get()
+    if profiles is None:
+        return fn(*args)
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Python 3.12+: one profiler per interpreter, and it already sees this thread
+        return fn(*args)
+    try:
+        return fn(*args)
+    finally:
+        profile.disable()
+        profiles.append(profile)
+
+
+def save_profile(profile: cProfile.Profile, extra: list, path: str):
+    stats = pstats.Stats(profile)
+    for other in extra:
+        stats.add(other)
+    stats.dump_stats(path)
+
+
+def prune(directory: str, keep: int):
+    files = sorted(glob.glob(os.path.join(directory, "*.prof")), key=os.path.getmtime)
+    for path in files[:-keep] if keep > 0 else []:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # another worker got there first
+
+
+def load_stats(paths: list[str]):
+    """Aggregate .prof files into one pstats.Stats (None if there are none)."""
+    stats = None
+    for path in paths:
+        try:
+            stats = pstats.Stats(path) if stats is None else stats.add(path)
+        except (OSError, EOFError, ValueError, TypeError):
+            continue  # half-written or foreign file
+    return stats
+
+
+def stats_text(stats: pstats.Stats, sort: str = "cumulative", limit: int = 50) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _label(func: tuple) -> str:
+    filename, line, name = func
+    where = "~" if filename == "~" else f"{os.path.basename(filename)}:{line}"
+    return f"{name} ({where})".replace(";", ":")
+
+
+def collapsed_stacks(stats: pstats.Stats, max_depth: int = 64, min_us: int = 1) -> str:
+    """
+    Collapsed stacks derived from cProfile's caller graph.
+
+    cProfile only records caller -> callee edges, not whole stacks, so each
+    function's own time is split over its call paths in proportion to the
+    cumulative time that reached it through each edge. Good enough to see
+    where time goes; exact for call trees without shared callees.
+    """
+    entries = stats.stats  # func -> (cc, nc, tottime, cumtime, callers)
+    children = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))  # edge cumtime
+    roots = [f for f, (_, _, _, _, callers) in entries.items() if not any(c in entries for c in callers)]
+
+    totals = {}
+
+    def visit(func, path, share):
+        _, _, tottime, cumtime, _ = entries[func]
+        path = path + [_label(func)]
+        self_us = int(tottime * share * 1e6)
+        if self_us >= min_us:
+            key = ";".join(path)
+            totals[key] = totals.get(key, 0) + self_us
+        if len(path) >= max_depth:
+            return
+        for child, edge_cumtime in children.get(func, ()):
+            child_cumtime = entries[child][3]
+            if child_cumtime <= 0 or _label(child) in path:
+                continue  # no time, or recursion
+            visit(child, path, share * min(1.0, edge_cumtime / child_cumtime))
+
+    for root in roots:
+        visit(root, [], 1.0)
+    return "".join(f"{stack} {us}\n" for stack, us in sorted(totals.items()))
@@ -0,0 +1,48 @@
+# Wire formats
+#   - JSON is rendered/parsed with orjson (app-wide ORJSONResponse)
+#   - /predict/batch also speaks msgpack (Content-Type / Accept: application/msgpack)
+#   - cached predictions are stored in Redis as one little-endian float64
+#     (8 bytes) instead of the JSON text '{"prediction": 450000.0}'
+import struct
+
+import orjson
+
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+def is_msgpack(content_type: str) -> bool:
+    return (content_type or "").split(";")[0].strip().lower() in _MSGPACK_TYPES
+
+
+def accepts_msgpack(accept: str) -> bool:
+    return any(is_msgpack(part) for part in (accept or "").split(","))
+
+
+def loads_body(body: bytes, content_type: str):
+    """Parse a request body as msgpack or JSON. Raises ValueError if malformed."""
+    if is_msgpack(content_type):
+        import msgpack
+        return msgpack.unpackb(body)
+    return orjson.loads(body)
+
+
+def dumps_msgpack(obj) -> bytes:
+    import msgpack
+    return msgpack.packb(obj)
+
+
+# ── Cache values ─────────────────────────────────────────────────────────────
+
+_PRICE = struct.Struct("<d")
+
+
+def pack_prediction(value: dict) -> bytes:
+    return _PRICE.pack(value["prediction"])
+
+
+def unpack_prediction(raw):
+    # anything that isn't exactly one float64 (e.g. an old JSON value) is a miss
+    if not raw or len(raw) != _PRICE.size:
+        return None
+    return {"prediction": _PRICE.unpack(raw)[0]}
@@ -0,0 +1,173 @@
+# Fixed-size, mergeable summaries of a stream of values
+#
+# QuantileSketch is a DDSketch: values go into log-spaced buckets, so every
+# quantile comes back within `relative_accuracy` of the true value, whatever
+# the number of values seen. Two sketches merge by adding bucket counts,
+# which is what lets every worker keep its own and combine them later.
+# CategoryCounts is a plain counter with a cap on distinct categories.
+import math
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1 / math.log(self.gamma)
+        self.bins = {}  # bucket index -> count (positive values)
+        self.negative = {}  # same for -value
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value > 0:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse(self.bins)
+        elif value < 0:
+            index = self._index(-value)
+            self.negative[index] = self.negative.get(index, 0) + 1
+            if len(self.negative) > self.max_bins:
+                self._collapse(self.negative)
+        elif value == 0:
+            self.zeros += 1
+        else:
+            self.count -= 1  # NaN
+            self.total -= value
+
+    def _collapse(self, bins: dict):
+        # fold the two smallest buckets together: only the extreme low tail loses accuracy
+        low, second = sorted(bins)[:2]
+        bins[second] += bins.pop(low)
+
+    def merge(self, other: "QuantileSketch"):
+        for mine, theirs in ((self.bins, other.bins), (self.negative, other.negative)):
+            for index, count in theirs.items():
+                mine[index] = mine.get(index, 0) + count
+            while len(mine) > self.max_bins:
+                self._collapse(mine)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+
+    def _value(self, index: int) -> float:
+        # midpoint (in relative terms) of bucket (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def _ordered(self):
+        """(value, count) for every bucket, smallest value first."""
+        for index in sorted(self.negative, reverse=True):
+            yield -self._value(index), self.negative[index]
+        if self.zeros:
+            yield 0.0, self.zeros
+        for index in sorted(self.bins):
+            yield self._value(index), self.bins[index]
+
+    def quantile(self, q: float):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        value = None
+        for value, count in self._ordered():
+            seen += count
+            if seen > rank:
+                return value
+        return value
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) * self._inv_log_gamma)
+
+    def rank(self, x: float) -> float:
+        """Approximate share of values <= x (x's own bucket counts as <= x)."""
+        if self.count == 0:
+            return 0.0
+        if x > 0:
+            index = self._index(x)
+            below = sum(self.negative.values()) + self.zeros
+            below += sum(count for i, count in self.bins.items() if i <= index)
+        elif x < 0:
+            index = self._index(-x)
+            below = sum(count for i, count in self.negative.items() if i >= index)
+        else:
+            below = sum(self.negative.values()) + self.zeros
+        return below / self.count
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": self.bins,
+            "negative": self.negative,
+            "zeros": self.zeros,
+            "count": self.count,
+            "total": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, max_bins: int = 2048) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], max_bins)
+        # JSON object keys are strings
+        sketch.bins = {int(k): v for k, v in data["bins"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        return sketch
+
+
+class CategoryCounts:
+    """Counts per category; past `max_categories` new ones are counted as OTHER."""
+
+    OTHER = "__other__"
+
+    def __init__(self, max_categories: int = 64):
+        self.max_categories = max_categories
+        self.counts = {}
+        self.count = 0
+
+    def add(self, category: str):
+        self.count += 1
+        if category not in self.counts and len(self.counts) >= self.max_categories:
+            category = self.OTHER
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+    def merge(self, other: "CategoryCounts"):
+        for category, count in other.counts.items():
+            if category not in self.counts and len(self.counts) >= self.max_categories:
+                category = self.OTHER
+            self.counts[category] = self.counts.get(category, 0) + count
+        self.count += other.count
+
+    def shares(self) -> dict:
+        return {category: count / self.count for category, count in self.counts.items()} if self.count else {}
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: dict, max_categories: int = 64) -> "CategoryCounts":
+        counts = cls(max_categories)
+        counts.counts = dict(data["counts"])
+        counts.count = data["count"]
+        return counts
+
+
+def psi(expected: dict, actual: dict, floor: float = 1e-4) -> float:
+    """
+    Population stability index between two {bucket: share} distributions.
+    Rule of thumb: < 0.1 stable, 0.1-0.25 some drift, > 0.25 significant drift.
+    """
+    total = 0.0
+    for bucket in set(expected) | set(actual):
+        e = max(expected.get(bucket, 0.0), floor)
+        a = max(actual.get(bucket, 0.0), floor)
+        total += (a - e) * math.log(a / e)
+    return total
@@ -0,0 +1,41 @@
+# Per-request auth cost: full jwt.decode vs the verified-token cache
+#
+#   python -m benchmarks.auth
+#
+# Measures what /predict pays in get_current_user + verify_api_key.
+from benchmarks.common import per_call, setup_env
+
+setup_env()
+
+from jose import jwt  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.dependencies import get_current_user, verify_api_key  # noqa: E402
+from app.core.security import create_token, token_cache  # noqa: E402
+
+
+def main():
+    token = create_token({"sub": "bench@example.com"})
+    api_key = settings.API_KEY
+
+    def before(i):
+        # what every request paid before the cache
+        jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        api_key == settings.API_KEY
+
+    def after(i):
+        get_current_user(token)
+        verify_api_key(api_key)
+
+    token_cache.clear()
+    after(0)  # first call decodes and fills the cache
+
+    cold = per_call(before, 20000)
+    warm = per_call(after, 20000)
+    print(f"jwt.decode per request : {cold:8.2f} us")
+    print(f"cached auth per request: {warm:8.2f} us")
+    print(f"speedup                : {cold / warm:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Scaling of the offline batch scorer with the number of worker processes
+#
+#   python -m benchmarks.batch_score [--copies 50] [--workers 1 2 4 8]
+#
+# Builds a large CSV by repeating data/car-details.csv, scores it with
+# app.services.batch_score at each worker count and prints rows/s and the
+# speedup over the single-process baseline (ideal: equal to the worker count).
+# Fails if any row comes back without a price.
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app.core.config import settings  # noqa: E402
+from app.services.batch_score import score_file  # noqa: E402
+from training.train_utils import DATA_FILE_PATH  # noqa: E402
+
+
+def build_input(path: str, copies: int) -> int:
+    with open(DATA_FILE_PATH, encoding="utf-8") as f:
+        header, *lines = f.read().splitlines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for _ in range(copies):
+            f.write("\n".join(lines) + "\n")
+    return len(lines) * copies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=50, help="times to repeat the dataset")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "cars.csv")
+        rows = build_input(input_path, args.copies)
+        print(f"{rows:,} rows, engine={settings.INFERENCE_ENGINE}")
+
+        baseline = None
+        for workers in args.workers:
+            stats = score_file(input_path, os.path.join(tmp, "priced.csv"), settings.MODEL_PATH,
+                               workers, args.chunk_rows)
+            # every row of the bundled dataset must get a price, including the
+            # ones with empty numeric fields (imputed by the model)
+            if stats["rows"] != rows or stats["errors"]:
+                raise SystemExit(f"expected {rows:,} priced rows, got {stats['rows']:,} "
+                                 f"with {stats['errors']:,} errors")
+            baseline = baseline or stats["rows_per_second"]
+            print(f"workers={workers:<3} {stats['rows_per_second']:>10,} rows/s  "
+                  f"speedup x{stats['rows_per_second'] / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Latency of the compiled inference engine vs the sklearn Pipeline
+#
+#   python -m benchmarks.compiled_model
+#
+# Prints single-row and batch latency for both engines. Parity with
+# model.predict is checked by tests/test_compiled_model.py.
+import joblib
+import pandas as pd
+
+from app.services.compiled_model import CompiledModel
+from benchmarks.common import per_call
+from training.train_utils import MODEL_PATH, TARGET, load_dataset
+
+
+def main():
+    model = joblib.load(MODEL_PATH)
+    compiled = CompiledModel.from_pipeline(model)
+
+    X = load_dataset().drop(columns=[TARGET])
+    rows = X.to_dict(orient="records")
+
+    row = rows[0]
+    batch = rows[:1000]
+    results = {
+        "sklearn  single": per_call(lambda i: model.predict(pd.DataFrame([row])), 200),
+        "compiled single": per_call(lambda i: compiled.predict([row]), 200),
+        "sklearn  batch ": per_call(lambda i: model.predict(pd.DataFrame(batch)), 5),
+        "compiled batch ": per_call(lambda i: compiled.predict(batch), 5),
+    }
+    for name, us in results.items():
+        print(f"{name}: {us / 1e3:8.3f} ms/call")
+    print(f"single-row speedup: {results['sklearn  single'] / results['compiled single']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Replay load test against a locally started API
+#
+#   python -m benchmarks.load_test --rps 200 --duration 20 --concurrency 64 \
+#       [--endpoints predict login signup] [--cache memory|none] \
+#       [--payloads requests.jsonl] [--workers 1]
+#
+# Starts uvicorn in a subprocess (Redis replaced by the in-memory stand-in or
+# disabled), waits for /ready, then sends requests open-loop at the target
+# rate and reports p50/p95/p99 latency and throughput per endpoint.
+# Latency is measured from each request's *scheduled* start, so a saturated
+# server shows up as queueing delay instead of hiding it.
+import argparse
+import itertools
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.common import bench_env, load_payloads, summarize
+
+PASSWORD = "bench-password"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, cache: str) -> subprocess.Popen:
+    env = bench_env(CACHE_BACKEND=cache)
+    env.pop("REDIS_URL", None)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def wait_ready(base: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base}/ready", timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("server did not become ready")
+
+
+def run_phase(name: str, send, rps: float, duration: float, concurrency: int) -> dict:
+    """Open-loop: request i is due at start + i / rps, whatever happened before."""
+    total = int(rps * duration)
+    local = threading.local()
+    latencies, errors = [], []
+    lock = threading.Lock()
+    start = time.perf_counter() + 0.1
+
+    def task(i: int):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        due = start + i / rps
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            ok = send(local.session, i)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - due
+        with lock:
+            (latencies if ok else errors).append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, range(total)))
+    wall = time.perf_counter() - start
+
+    stats = summarize(latencies)
+    return {
+        "endpoint": name,
+        "requests": total,
+        "errors": len(errors),
+        "throughput": len(latencies) / wall,
+        **{f"p{q}": v * 1000 for q, v in stats.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=100)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--endpoints", nargs="+", default=["predict", "login", "signup"],
+                        choices=["predict", "login", "signup"])
+    parser.add_argument("--cache", default="memory", choices=["memory", "none"])
+    parser.add_argument("--payloads", default="requests.jsonl")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--base-url", default=None, help="benchmark an already running server")
+    args = parser.parse_args()
+
+    server = None
+    base = args.base_url
+    if base is None:
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.workers, args.cache)
+    try:
+        wait_ready(base)
+
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        requests.post(f"{base}/signup", json={"email": email, "password": PASSWORD}, timeout=30)
+        token = requests.post(f"{base}/login", json={"email": email, "password": PASSWORD},
+                              timeout=30).json()["access_token"]
+        headers = {"token": token, "api-key": bench_env()["API_KEY"]}
+
+        payloads = load_payloads(args.payloads)
+        cycle = itertools.cycle(payloads)
+        cycle_lock = threading.Lock()
+
+        def send_predict(session, i):
+            with cycle_lock:
+                body = next(cycle)
+            return session.post(f"{base}/predict", json=body, headers=headers, timeout=30).ok
+
+        def send_login(session, i):
+            return session.post(f"{base}/login", json={"email": email, "password": PASSWORD}, timeout=30).ok
+
+        def send_signup(session, i):
+            body = {"email": f"bench-{uuid.uuid4().hex}@example.com", "password": PASSWORD}
+            return session.post(f"{base}/signup", json=body, timeout=30).ok
+
+        senders = {"predict": send_predict, "login": send_login, "signup": send_signup}
+        print(f"target {args.rps:.0f} rps x {args.duration:.0f}s, concurrency {args.concurrency}, "
+              f"cache={args.cache}, {len(payloads)} payloads")
+        print(f"{'endpoint':<10}{'reqs':>7}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name in args.endpoints:
+            r = run_phase(name, senders[name], args.rps, args.duration, args.concurrency)
+            print(f"{r['endpoint']:<10}{r['requests']:>7}{r['errors']:>8}{r['throughput']:>9.1f}"
+                  f"{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
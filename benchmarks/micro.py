@@ -0,0 +1,71 @@
+# Microbenchmarks for the hot-path functions
+#
+#   python -m benchmarks.micro [--cache memory|none]
+#
+# Runs in-process (no HTTP) with Redis replaced by the in-memory stand-in,
+# so numbers reflect our code, not the network.
+import argparse
+import asyncio
+
+from benchmarks.common import per_call, per_call_async, setup_env
+
+
+async def run(results: dict):
+    from app.cache import prediction_cache
+    from app.core.security import create_token, token_cache, verify_token
+    from app.services import model_service
+    from benchmarks.common import load_payloads
+
+    model_service.load_model()
+    model_service.warm_up()
+    version = model_service.active_version()
+    row = load_payloads(limit=1)[0]
+
+    # ── Auth ──
+    token = create_token({"sub": "bench@example.com"})
+
+    def verify_cold(i):
+        token_cache.clear()
+        verify_token(token)
+
+    results["verify_token (decode)"] = per_call(verify_cold, 2000)
+    results["verify_token (cached)"] = per_call(lambda i: verify_token(token), 20000)
+
+    # ── Cache ──
+    key = model_service.make_cache_key(row, version)
+    results["make_cache_key"] = per_call(lambda i: model_service.make_cache_key(row, version), 20000)
+    prediction_cache.set_cached_predictions({key: {"prediction": 1.0}})
+    results["cache get (local hit)"] = await per_call_async(
+        lambda i: prediction_cache.get_cached_predictions([key]), 20000)
+
+    async def redis_tier_hit(i):
+        prediction_cache.local_cache.clear()
+        await prediction_cache.get_cached_predictions([key])
+
+    results["cache get (redis tier hit)"] = await per_call_async(redis_tier_hit, 5000)
+    results["cache set (local + scheduled)"] = per_call(
+        lambda i: prediction_cache.set_cached_predictions({f"{key}:{i}": {"prediction": 1.0}}), 5000)
+    await asyncio.sleep(0.1)  # let scheduled writes drain
+
+    # ── Prediction ──
+    await model_service.predict_car_price(row)
+    results["predict_car_price (cache hit)"] = await per_call_async(
+        lambda i: model_service.predict_car_price(row), 5000)
+    results["predict_car_price (cache miss)"] = await per_call_async(
+        lambda i: model_service.predict_car_price(dict(row, km_driven=float(10_000_000 + i))), 200)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cache", default="memory", choices=["memory", "none"])
+    args = parser.parse_args()
+    setup_env(CACHE_BACKEND=args.cache)
+
+    results = {}
+    asyncio.run(run(results))
+    for name, us in results.items():
+        print(f"{name:<34}{us:>10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
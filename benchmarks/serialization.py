@@ -0,0 +1,58 @@
+# Serialization cost per prediction, old formats vs the ones the API uses now
+#
+#   python -m benchmarks.serialization [--batch 100]
+#
+# Covers every encode/decode on the /predict path: request body parsing,
+# pydantic validation + model_dump, the cache key, the Redis value and the
+# response body. Batch body parsing is reported per row.
+import argparse
+import hashlib
+import json
+
+import msgpack
+import orjson
+
+from benchmarks.common import load_payloads, per_call, setup_env
+
+setup_env()
+
+from app.api.routes_predict import CarFeatures, batch_adapter  # noqa: E402
+from app.utils.serialization import pack_prediction, unpack_prediction  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=100, help="rows per batch body")
+    args = parser.parse_args()
+
+    rows = load_payloads(limit=args.batch)
+    row = rows[0]
+    n = len(rows)
+    value = {"prediction": 452310.77}
+    response = {"predicted_price": f"{value['prediction']:,.2f}"}
+    json_body, msgpack_body = json.dumps(rows).encode(), msgpack.packb(rows)
+    json_value, binary_value = json.dumps(value), pack_prediction(value)
+
+    results = [
+        ("request body (json)", per_call(lambda i: json.loads(json_body), 2000) / n),
+        ("request body (orjson)", per_call(lambda i: orjson.loads(json_body), 2000) / n),
+        ("request body (msgpack)", per_call(lambda i: msgpack.unpackb(msgpack_body), 2000) / n),
+        ("validate + model_dump", per_call(lambda i: CarFeatures(**row).model_dump(), 20000)),
+        ("validate batch (per row)", per_call(lambda i: batch_adapter.validate_python(rows), 500) / n),
+        ("cache key (json.dumps)", per_call(
+            lambda i: hashlib.sha256(json.dumps(row, sort_keys=True).encode()).hexdigest(), 20000)),
+        ("cache key (orjson)", per_call(
+            lambda i: hashlib.sha256(orjson.dumps(row, option=orjson.OPT_SORT_KEYS)).hexdigest(), 20000)),
+        ("cache value (json)", per_call(lambda i: json.loads(json.dumps(value)), 20000)),
+        ("cache value (float64)", per_call(lambda i: unpack_prediction(pack_prediction(value)), 20000)),
+        ("response (json)", per_call(lambda i: json.dumps(response).encode(), 20000)),
+        ("response (orjson)", per_call(lambda i: orjson.dumps(response), 20000)),
+    ]
+    for name, us in results:
+        print(f"{name:<28}{us:>10.3f} us")
+    print(f"cache value size: json {len(json_value)} B, binary {len(binary_value)} B; "
+          f"batch of {n}: json {len(json_body)} B, msgpack {len(msgpack_body)} B")
+
+
+if __name__ == "__main__":
+    main()
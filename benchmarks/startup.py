@@ -0,0 +1,61 @@
+# Cold-start benchmark: import time of app.main + lifespan (model load, warm-up)
+#
+#   python -m benchmarks.startup [--runs 5] [--max-seconds 10]
+#
+# Each run is a fresh interpreter, like a new container. With --max-seconds
+# the script exits 1 when the median total goes over budget, so it can gate CI.
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import bench_env
+
+CHILD = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import app.main as main
+t1 = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        t2 = time.perf_counter()
+        while not main.model_service.warmed_up:
+            await asyncio.sleep(0.005)
+        return t2, time.perf_counter()
+
+t2, t3 = asyncio.run(run())
+print(json.dumps({"import": t1 - t0, "load": t2 - t1, "warmup": t3 - t2, "total": t3 - t0}))
+"""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    env = bench_env()
+    env.pop("REDIS_URL", None)  # cache disabled, startup must not need Redis
+
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD], env=env, check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+
+    for phase in ("import", "load", "warmup", "total"):
+        values = [r[phase] for r in runs]
+        print(f"{phase:>7}: median {statistics.median(values):7.3f}s  max {max(values):7.3f}s")
+
+    total = statistics.median(r["total"] for r in runs)
+    if args.max_seconds is not None and total > args.max_seconds:
+        print(f"startup regression: {total:.3f}s > {args.max_seconds:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# Per-worker memory with 1, 4 and 8 workers, for each way of loading the model
+#
+#   python -m benchmarks.worker_rss [--workers 1 4 8]
+#
+# Every worker loads the model the way app/services/model_service.py does and
+# runs one prediction, then all of them report RSS and PSS at the same time.
+# PSS (proportional set size) splits shared pages between the processes that
+# map them, so memory-mapped tree arrays show up as shared, not duplicated.
+# Linux only (reads /proc/self/smaps_rollup).
+import argparse
+import multiprocessing as mp
+import os
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app.services.compiled_model import CompiledModel, build_artifact  # noqa: E402
+from app.services.model_registry import WARMUP_ROW  # noqa: E402
+from training.train_utils import MODEL_PATH  # noqa: E402
+
+ARTIFACT_PATH = os.path.splitext(MODEL_PATH)[0] + ".compiled.joblib"
+
+
+def memory_kb() -> dict:
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                usage[name] = int(rest.split()[0])
+    return usage
+
+
+def worker(mode: str, loaded, release, results):
+    if mode == "sklearn":
+        import joblib
+        import pandas as pd
+        model = joblib.load(MODEL_PATH)
+        model.predict(pd.DataFrame([WARMUP_ROW]))
+    else:
+        model = CompiledModel.load(ARTIFACT_PATH, mmap=(mode == "compiled-mmap"))
+        model.predict([WARMUP_ROW])
+
+    loaded.release()
+    release.wait()  # measure while every worker is alive
+    results.put(memory_kb())
+
+
+def measure(mode: str, n_workers: int) -> tuple[float, float]:
+    ctx = mp.get_context("spawn")  # fresh interpreters, like uvicorn --workers
+    loaded, release, results = ctx.Semaphore(0), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, loaded, release, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        loaded.acquire()
+    release.set()
+    usage = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return (
+        sum(u["Rss"] for u in usage) / n_workers / 1024,
+        sum(u["Pss"] for u in usage) / 1024,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    build_artifact(MODEL_PATH, ARTIFACT_PATH)
+
+    print(f"{'mode':<15}{'workers':>8}{'RSS/worker MB':>15}{'total PSS MB':>14}")
+    for mode in ("sklearn", "compiled", "compiled-mmap"):
+        for n in args.workers:
+            rss, pss = measure(mode, n)
+            print(f"{mode:<15}{n:>8}{rss:>15.1f}{pss:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
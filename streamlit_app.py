@@ -1,9 +1,28 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+import json
 import os
+import time
 API_BASE = os.getenv("API_BASE", "http://localhost:8000")
 
 API_KEY = "semaphore"  # must match the API_KEY env var
+# Identical predictions in one browser session are answered from the UI's own
+# cache for this long (short: the API may hot-swap to a new model meanwhile)
+PREDICTION_CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", 60))
+PREDICTION_CACHE_MAX = 256  # entries per session
+
+# Form choices, shared by the single-car form and the compare table
+COMPANIES = [
+    "Maruti", "Hyundai", "Honda", "Toyota", "Ford",
+    "Tata", "Mahindra", "Volkswagen", "Renault",
+    "Kia", "MG", "Skoda", "Jeep", "Others",
+]
+OWNERS = ["First", "Second", "Third", "Fourth & Above", "Test Drive Car"]
+FUELS = ["Petrol", "Diesel", "CNG", "LPG", "Electric"]
+SELLER_TYPES = ["Individual", "Dealer", "Trustmark Dealer"]
+TRANSMISSIONS = ["Manual", "Automatic"]
+SEATS = [2, 4, 5, 6, 7, 8, 9, 10]
 
 # ── Page config ───────────────────────────────────────────────────────────────
 
@@ -19,6 +38,8 @@ if "token" not in st.session_state:
     st.session_state.token = None
 if "user_email" not in st.session_state:
     st.session_state.user_email = None
+if "predictions" not in st.session_state:
+    st.session_state.predictions = {}  # see _cached_post
 
 
 # ── Helper ────────────────────────────────────────────────────────────────────
@@ -30,6 +51,82 @@ def auth_headers():
     }
 
 
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    One pooled Session for the whole Streamlit server: keep-alive connections
+    to the API are reused across clicks, reruns and users.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ApiError(Exception):
+    """A non-200 answer from the API (raised, so it is never cached)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _post(path: str, payload, headers: dict, timeout: float) -> dict:
+    resp = get_session().post(f"{API_BASE}{path}", json=payload, headers=headers, timeout=timeout)
+    if resp.status_code != 200:
+        try:
+            detail = resp.json().get("detail", "Prediction failed.")
+        except ValueError:
+            detail = "Prediction failed."
+        raise ApiError(resp.status_code, str(detail))
+    return resp.json()
+
+
+def _cached_post(path: str, payload, headers: dict, timeout: float) -> dict:
+    """
+    Streamlit reruns the whole script on every interaction; identical inputs
+    are answered from here instead of calling the API again. The cache lives
+    in st.session_state, so it is never shared between users (every user's
+    quotes go through the API's auth, rate limit and audit log), and it is
+    keyed by user too, for a log out / log in within the same session.
+    """
+    cache = st.session_state.predictions
+    key = (st.session_state.user_email, path, json.dumps(payload, sort_keys=True))
+    now = time.monotonic()
+    hit = cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+
+    result = _post(path, payload, headers, timeout)  # errors raise, never cached
+    for stale in [k for k, (expires_at, _) in cache.items() if expires_at <= now]:
+        del cache[stale]
+    if len(cache) >= PREDICTION_CACHE_MAX:
+        del cache[next(iter(cache))]  # oldest entry
+    cache[key] = (now + PREDICTION_CACHE_TTL, result)
+    return result
+
+
+def predict_price(payload: dict, headers: dict) -> str:
+    return _cached_post("/predict", payload, headers, timeout=15)["predicted_price"]
+
+
+def predict_prices(payloads: list[dict], headers: dict) -> list[str]:
+    # All cars in one /predict/batch call instead of one request per car
+    return _cached_post("/predict/batch", payloads, headers, timeout=30)["predicted_prices"]
+
+
+def handle_api_error(exc: ApiError):
+    if exc.status_code == 401:
+        st.error("Session expired. Please log in again.")
+        st.session_state.token = None
+        st.session_state.user_email = None
+        st.rerun()
+    else:
+        st.error(exc.detail)
+
+
 # ── Sidebar ───────────────────────────────────────────────────────────────────
 
 with st.sidebar:
@@ -67,7 +164,7 @@ if not st.session_state.token:
             else:
                 with st.spinner("Logging in…"):
                     try:
-                        resp = requests.post(
+                        resp = get_session().post(
                             f"{API_BASE}/login",
                             json={"email": email, "password": password},
                             timeout=10,
@@ -106,7 +203,7 @@ if not st.session_state.token:
             else:
                 with st.spinner("Creating account…"):
                     try:
-                        resp = requests.post(
+                        resp = get_session().post(
                             f"{API_BASE}/signup",
                             json={"email": new_email, "password": new_pass},
                             timeout=10,
@@ -122,81 +219,120 @@ if not st.session_state.token:
 # ── Prediction page (shown only when logged in) ───────────────────────────────
 else:
     st.title("🚗 Car Price Predictor")
-    st.write("Fill in the details below and hit **Predict** to get an estimated price.")
-    st.divider()
+    tab_single, tab_compare = st.tabs(["🔍 Single car", "⚖️ Compare cars"])
 
-    # ── Form ──────────────────────────────────────────────────────────────────
-    with st.form("predict_form"):
-        col1, col2 = st.columns(2)
-
-        with col1:
-            company = st.selectbox(
-                "Car Company",
-                [
-                    "Maruti", "Hyundai", "Honda", "Toyota", "Ford",
-                    "Tata", "Mahindra", "Volkswagen", "Renault",
-                    "Kia", "MG", "Skoda", "Jeep", "Others",
-                ],
-            )
-            year = st.number_input("Year of Manufacture", min_value=1990, max_value=2024, value=2018, step=1)
-            owner = st.selectbox(
-                "Owner Type",
-                ["First", "Second", "Third", "Fourth & Above", "Test Drive Car"],
-            )
-            fuel = st.selectbox("Fuel Type", ["Petrol", "Diesel", "CNG", "LPG", "Electric"])
-            seller_type = st.selectbox("Seller Type", ["Individual", "Dealer", "Trustmark Dealer"])
-            transmission = st.selectbox("Transmission", ["Manual", "Automatic"])
-
-        with col2:
-            km_driven = st.number_input("Kilometres Driven", min_value=0, max_value=1_000_000, value=45000, step=1000)
-            mileage_mpg = st.number_input("Mileage (mpg)", min_value=0.0, max_value=100.0, value=22.5, step=0.5)
-            engine_cc = st.number_input("Engine (cc)", min_value=500, max_value=6000, value=1197, step=50)
-            max_power_bhp = st.number_input("Max Power (bhp)", min_value=10.0, max_value=600.0, value=82.0, step=1.0)
-            torque_nm = st.number_input("Torque (Nm)", min_value=0.0, max_value=1000.0, value=113.0, step=1.0)
-            seats = st.selectbox("Seats", [2, 4, 5, 6, 7, 8, 9, 10], index=2)
-
-        predict_btn = st.form_submit_button("🔍 Predict Price", use_container_width=True)
-
-    # ── Prediction call ───────────────────────────────────────────────────────
-    if predict_btn:
-        payload = {
-            "company": company,
-            "year": int(year),
-            "owner": owner,
-            "fuel": fuel,
-            "seller_type": seller_type,
-            "transmission": transmission,
-            "km_driven": float(km_driven),
-            "mileage_mpg": float(mileage_mpg),
-            "engine_cc": float(engine_cc),
-            "max_power_bhp": float(max_power_bhp),
-            "torque_nm": float(torque_nm),
-            "seats": float(seats),
-        }
-        with st.spinner("Predicting…"):
-            try:
-                resp = requests.post(
-                    f"{API_BASE}/predict",
-                    json=payload,
-                    headers=auth_headers(),
-                    timeout=15,
-                )
-                if resp.status_code == 200:
-                    price = resp.json()["predicted_price"]
+    # ── Single car ────────────────────────────────────────────────────────────
+    with tab_single:
+        st.write("Fill in the details below and hit **Predict** to get an estimated price.")
+        st.divider()
+
+        with st.form("predict_form"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                company = st.selectbox("Car Company", COMPANIES)
+                year = st.number_input("Year of Manufacture", min_value=1990, max_value=2024, value=2018, step=1)
+                owner = st.selectbox("Owner Type", OWNERS)
+                fuel = st.selectbox("Fuel Type", FUELS)
+                seller_type = st.selectbox("Seller Type", SELLER_TYPES)
+                transmission = st.selectbox("Transmission", TRANSMISSIONS)
+
+            with col2:
+                km_driven = st.number_input("Kilometres Driven", min_value=0, max_value=1_000_000, value=45000, step=1000)
+                mileage_mpg = st.number_input("Mileage (mpg)", min_value=0.0, max_value=100.0, value=22.5, step=0.5)
+                engine_cc = st.number_input("Engine (cc)", min_value=500, max_value=6000, value=1197, step=50)
+                max_power_bhp = st.number_input("Max Power (bhp)", min_value=10.0, max_value=600.0, value=82.0, step=1.0)
+                torque_nm = st.number_input("Torque (Nm)", min_value=0.0, max_value=1000.0, value=113.0, step=1.0)
+                seats = st.selectbox("Seats", SEATS, index=2)
+
+            predict_btn = st.form_submit_button("🔍 Predict Price", use_container_width=True)
+
+        if predict_btn:
+            payload = {
+                "company": company,
+                "year": int(year),
+                "owner": owner,
+                "fuel": fuel,
+                "seller_type": seller_type,
+                "transmission": transmission,
+                "km_driven": float(km_driven),
+                "mileage_mpg": float(mileage_mpg),
+                "engine_cc": float(engine_cc),
+                "max_power_bhp": float(max_power_bhp),
+                "torque_nm": float(torque_nm),
+                "seats": float(seats),
+            }
+            with st.spinner("Predicting…"):
+                try:
+                    price = predict_price(payload, auth_headers())
                     st.success("Prediction complete!")
                     st.metric(
                         label="Estimated Selling Price (₹)",
                         value=f"₹ {price}",
                     )
-                elif resp.status_code == 401:
-                    st.error("Session expired. Please log in again.")
-                    st.session_state.token = None
-                    st.session_state.user_email = None
-                    st.rerun()
-                else:
-                    st.error(resp.json().get("detail", "Prediction failed."))
-            except requests.exceptions.ConnectionError:
-                st.error("Cannot reach the API. Is the server running on port 8000?")
+                except ApiError as exc:
+                    handle_api_error(exc)
+                except requests.exceptions.ConnectionError:
+                    st.error("Cannot reach the API. Is the server running on port 8000?")
+
+    # ── Compare cars ──────────────────────────────────────────────────────────
+    with tab_compare:
+        st.write("Edit or add rows, then hit **Compare** to price every car in one request.")
+
+        default_cars = [
+            {"company": "Maruti", "year": 2018, "owner": "First", "fuel": "Petrol",
+             "seller_type": "Individual", "transmission": "Manual", "km_driven": 45000,
+             "mileage_mpg": 22.5, "engine_cc": 1197, "max_power_bhp": 82.0, "torque_nm": 113.0, "seats": 5},
+            {"company": "Hyundai", "year": 2019, "owner": "First", "fuel": "Diesel",
+             "seller_type": "Dealer", "transmission": "Manual", "km_driven": 60000,
+             "mileage_mpg": 24.0, "engine_cc": 1396, "max_power_bhp": 89.0, "torque_nm": 220.0, "seats": 5},
+            {"company": "Toyota", "year": 2016, "owner": "Second", "fuel": "Diesel",
+             "seller_type": "Individual", "transmission": "Automatic", "km_driven": 90000,
+             "mileage_mpg": 15.0, "engine_cc": 2393, "max_power_bhp": 147.5, "torque_nm": 343.0, "seats": 7},
+        ]
+        cars = st.data_editor(
+            default_cars,
+            num_rows="dynamic",
+            use_container_width=True,
+            key="compare_cars",
+            column_config={
+                "company": st.column_config.SelectboxColumn("Company", options=COMPANIES, required=True),
+                "year": st.column_config.NumberColumn("Year", min_value=1990, max_value=2024, step=1, required=True),
+                "owner": st.column_config.SelectboxColumn("Owner", options=OWNERS, required=True),
+                "fuel": st.column_config.SelectboxColumn("Fuel", options=FUELS, required=True),
+                "seller_type": st.column_config.SelectboxColumn("Seller", options=SELLER_TYPES, required=True),
+                "transmission": st.column_config.SelectboxColumn("Transmission", options=TRANSMISSIONS, required=True),
+                "km_driven": st.column_config.NumberColumn("Km", min_value=0, required=True),
+                "mileage_mpg": st.column_config.NumberColumn("Mileage (mpg)", min_value=0.0, required=True),
+                "engine_cc": st.column_config.NumberColumn("Engine (cc)", min_value=500, required=True),
+                "max_power_bhp": st.column_config.NumberColumn("Power (bhp)", min_value=10.0, required=True),
+                "torque_nm": st.column_config.NumberColumn("Torque (Nm)", min_value=0.0, required=True),
+                "seats": st.column_config.SelectboxColumn("Seats", options=SEATS, required=True),
+            },
+        )
+
+        if st.button("⚖️ Compare", use_container_width=True):
+            rows = [car for car in cars if all(v is not None for v in car.values())]
+            if not rows:
+                st.error("Add at least one complete car.")
+            else:
+                payloads = [
+                    {**car, "year": int(car["year"]),
+                     **{k: float(car[k]) for k in ("km_driven", "mileage_mpg", "engine_cc",
+                                                   "max_power_bhp", "torque_nm", "seats")}}
+                    for car in rows
+                ]
+                with st.spinner(f"Pricing {len(payloads)} cars…"):
+                    try:
+                        prices = predict_prices(payloads, auth_headers())
+                        st.dataframe(
+                            [{"Estimated price (₹)": price, **car} for car, price in zip(rows, prices)],
+                            use_container_width=True,
+                        )
+                    except ApiError as exc:
+                        handle_api_error(exc)
+                    except requests.exceptions.ConnectionError:
+                        st.error("Cannot reach the API. Is the server running on port 8000?")
 
     # ── Tip section ───────────────────────────────────────────────────────────
     with st.expander("ℹ️ How does this work?"):
@@ -0,0 +1,64 @@
+# Parity of the compiled inference engine (INFERENCE_ENGINE=compiled) with
+# the sklearn Pipeline it is built from: same prices on every row of the
+# dataset, and the same inputs rejected.
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.compiled_model import CompiledModel
+from training.train_utils import MODEL_PATH, TARGET, load_dataset
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def compiled(pipeline):
+    return CompiledModel.from_pipeline(pipeline)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return load_dataset().drop(columns=[TARGET])
+
+
+def test_matches_pipeline_on_dataset(pipeline, compiled, dataset):
+    # ~200 rows have missing numeric values, imputed by both engines
+    assert dataset.isna().any(axis=None)
+    expected = pipeline.predict(dataset)
+    got = compiled.predict(dataset.to_dict(orient="records"))
+    assert np.allclose(got, expected, rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("column", ["km_driven", "mileage_mpg", "engine_cc", "max_power_bhp", "torque_nm", "seats"])
+@pytest.mark.parametrize("missing", [None, float("nan")])
+def test_matches_pipeline_with_missing_numeric(pipeline, compiled, dataset, column, missing):
+    rows = [dict(row, **{column: missing}) for row in dataset.head(50).to_dict(orient="records")]
+    expected = pipeline.predict(pd.DataFrame(rows))
+    assert np.allclose(compiled.predict(rows), expected, rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("column, value", [
+    ("company", "Bugatti"),
+    ("fuel", "Hydrogen"),
+    ("owner", "Sixth"),
+    ("transmission", "CVT"),
+    ("company", None),
+    ("fuel", None),
+    ("owner", None),
+    ("seller_type", float("nan")),
+    ("year", float("nan")),  # KBinsDiscretizer, no imputer
+])
+def test_rejects_what_pipeline_rejects(pipeline, compiled, dataset, column, value):
+    row = dict(dataset.iloc[0].to_dict(), **{column: value})
+    with pytest.raises((ValueError, TypeError)):
+        pipeline.predict(pd.DataFrame([row]))
+    with pytest.raises(ValueError):
+        compiled.predict([row])
+
+
+def test_empty_batch(compiled):
+    assert compiled.predict([]).shape == (0,)
@@ -1,87 +1,323 @@
+"""
+Train the car price model.
+
+    python -m training.train_model                     # default GradientBoosting, as before
+    python -m training.train_model --search            # compare candidates, keep the default
+    python -m training.train_model --search --select pareto --max-latency-ms 2
+
+The cleaned split and the fitted preprocessing (feature matrices) are cached
+on disk with joblib.Memory, so re-runs only fit the regressors. With
+--search every candidate is fitted in parallel across cores, then timed
+one by one (single-row and batch latency through the full Pipeline), so
+the choice can be made on the accuracy / latency Pareto front.
+"""
+import argparse
+import json
 import os
+import time
 import joblib
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, KBinsDiscretizer, StandardScaler
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.pipeline import Pipeline
 
 # Import local modules
-from training.train_utils import DATA_FILE_PATH, MODEL_DIR, MODEL_PATH
-
-# Load the dataset
-df = (
-    pd.read_csv(DATA_FILE_PATH)
-      .drop_duplicates()
-      .drop(columns=['name', 'model', 'edition'])
-      .assign(
-          company=lambda x: x['company'].where(
-              x['company'].map(x['company'].value_counts()) > 100,
-              'Others'
-          )
-      )
+from app.utils.files import file_hash
+from training.train_utils import (
+    BASELINE_PATH, CATEGORICAL_FEATURES, DATA_FILE_PATH, DEFAULT_SKETCH_ACCURACY, MODEL_PATH,
+    NUMERIC_FEATURES, PRICE_FEATURE, QUANTILES, SKETCH_ACCURACY, TARGET, load_dataset,
 )
 
-# Train Test Split
-X = df.iloc[:, :-1]
-y = df.iloc[:, -1]
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Define our Imputers and encoders
-mean_spi = SimpleImputer(strategy='mean')
-median_spi = SimpleImputer(strategy='median')
-ohe = OneHotEncoder(drop='first', sparse_output=False)
-ode = OrdinalEncoder(categories=[['Test Drive Car', 'Fourth & Above', 'Third', 'Second', 'First']])
-kbin = KBinsDiscretizer(n_bins=10, encode='ordinal', strategy='uniform') # Discretization
-scaler = StandardScaler()
-
-
-#Handele Numeric val
-num_pipeline = Pipeline(steps=[
-    ("median_spi", median_spi),
-    ("scaler", StandardScaler())
-])
-
-torque_pipe = Pipeline(steps=[
-    ("mean_spi", mean_spi),
-    ("scaler", StandardScaler())
-])
-
-# Preprocession data using Column Transformer
-preprocessor = ColumnTransformer(
-    [
-        ("other_num", num_pipeline,['km_driven', 'mileage_mpg', 'engine_cc', 'max_power_bhp','seats']),
-        ("torque", torque_pipe, ['torque_nm']),
-        ("ohe", ohe, ['fuel', 'transmission', 'seller_type', 'company']),
-        ("ode", ode, ['owner']),
-        ("kbin", kbin, ['year'])
-    ]
-)
+CACHE_DIR = os.path.join('.cache', 'training')
+memory = joblib.Memory(CACHE_DIR, verbose=0)
 
-# Train of Random Forest Regressor
-gbReg = GradientBoostingRegressor(
-    n_estimators=200,
-    learning_rate=0.05,
-    max_depth=5,
-    random_state=2,
-    alpha=0.1,
-    max_features=0.75
-)
 
-#Make pipeline of out model
-gb_model = Pipeline(
-    steps=[
-        ('Preprocessing', preprocessor),
-        ('model', gbReg)
-    ]
-)
+# ── Data ─────────────────────────────────────────────────────────────────────
+
+@memory.cache
+def load_split(data_path: str, data_hash: str, test_size: float = 0.2, random_state: int = 42):
+    # Load the dataset and make the Train Test Split.
+    # data_hash is only there for the cache key: editing or replacing the
+    # CSV at the same path must not reuse the old split
+    df = load_dataset(data_path)
+    X = df.drop(columns=[TARGET])
+    y = df[TARGET]
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+def build_preprocessor() -> ColumnTransformer:
+    # Define our Imputers and encoders
+    mean_spi = SimpleImputer(strategy='mean')
+    median_spi = SimpleImputer(strategy='median')
+    ohe = OneHotEncoder(drop='first', sparse_output=False)
+    ode = OrdinalEncoder(categories=[['Test Drive Car', 'Fourth & Above', 'Third', 'Second', 'First']])
+    kbin = KBinsDiscretizer(n_bins=10, encode='ordinal', strategy='uniform') # Discretization
+
+    #Handele Numeric val
+    num_pipeline = Pipeline(steps=[
+        ("median_spi", median_spi),
+        ("scaler", StandardScaler())
+    ])
+
+    torque_pipe = Pipeline(steps=[
+        ("mean_spi", mean_spi),
+        ("scaler", StandardScaler())
+    ])
+
+    # Preprocession data using Column Transformer
+    return ColumnTransformer(
+        [
+            ("other_num", num_pipeline,['km_driven', 'mileage_mpg', 'engine_cc', 'max_power_bhp','seats']),
+            ("torque", torque_pipe, ['torque_nm']),
+            ("ohe", ohe, ['fuel', 'transmission', 'seller_type', 'company']),
+            ("ode", ode, ['owner']),
+            ("kbin", kbin, ['year'])
+        ]
+    )
+
+
+@memory.cache
+def preprocess(preprocessor: ColumnTransformer, X_train: pd.DataFrame, X_test: pd.DataFrame):
+    """
+    Fit the preprocessing once; every candidate trains on the same matrices.
+    The unfitted preprocessor is an argument so that changing its steps or
+    parameters (like a different split) invalidates the cache.
+    """
+    preprocessor = preprocessor.fit(X_train)
+    return preprocessor, preprocessor.transform(X_train), preprocessor.transform(X_test)
+
+
+# ── Candidates ───────────────────────────────────────────────────────────────
+
+def default_regressor():
+    # The model we have always shipped
+    return GradientBoostingRegressor(
+        n_estimators=200,
+        learning_rate=0.05,
+        max_depth=5,
+        random_state=2,
+        alpha=0.1,
+        max_features=0.75
+    )
+
+
+def candidates() -> dict:
+    return {
+        "gbr_200_d5": default_regressor(),
+        "gbr_100_d5": GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=5,
+                                                random_state=2, max_features=0.75),
+        "gbr_100_d3": GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=3,
+                                                random_state=2),
+        "gbr_50_d4": GradientBoostingRegressor(n_estimators=50, learning_rate=0.2, max_depth=4,
+                                               random_state=2),
+        "hgb_200": HistGradientBoostingRegressor(max_iter=200, learning_rate=0.05, random_state=2),
+        "hgb_100_l15": HistGradientBoostingRegressor(max_iter=100, learning_rate=0.1, max_leaf_nodes=15,
+                                                     random_state=2),
+        "rf_100_d12": RandomForestRegressor(n_estimators=100, max_depth=12, random_state=2, n_jobs=1),
+        "rf_30_d10": RandomForestRegressor(n_estimators=30, max_depth=10, random_state=2, n_jobs=1),
+    }
+
+
+def fit_candidate(name: str, regressor, Xt_train, y_train, Xt_test, y_test) -> dict:
+    start = time.perf_counter()
+    regressor.fit(Xt_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    predictions = regressor.predict(Xt_test)
+    return {
+        "name": name,
+        "regressor": regressor,
+        "mae": float(mean_absolute_error(y_test, predictions)),
+        "r2": float(r2_score(y_test, predictions)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def measure_latency(model: Pipeline, X_test: pd.DataFrame, single_repeat: int = 200, batch_size: int = 1000) -> dict:
+    """Median single-row latency and per-row batch latency through the full Pipeline."""
+    row = X_test.iloc[[0]]
+    model.predict(row)  # warm up
+    timings = []
+    for _ in range(single_repeat):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    batch = X_test.sample(n=batch_size, replace=len(X_test) < batch_size, random_state=0)
+    start = time.perf_counter()
+    model.predict(batch)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "single_ms": timings[len(timings) // 2] * 1000,
+        "batch_us_per_row": batch_seconds / batch_size * 1e6,
+    }
+
+
+def pareto_front(results: list[dict]) -> list[str]:
+    """Candidates no other candidate beats on both MAE and single-row latency."""
+    front = []
+    for r in results:
+        dominated = any(
+            o["mae"] <= r["mae"] and o["single_ms"] <= r["single_ms"]
+            and (o["mae"] < r["mae"] or o["single_ms"] < r["single_ms"])
+            for o in results
+        )
+        if not dominated:
+            front.append(r["name"])
+    return front
+
+
+def select(results: list[dict], strategy: str, max_latency_ms: float = None) -> dict:
+    if strategy == "default":
+        return next(r for r in results if r["name"] == "gbr_200_d5")
+    pool = results
+    if strategy == "pareto":
+        front = set(pareto_front(results))
+        pool = [r for r in results if r["name"] in front]
+    if max_latency_ms is not None:
+        fast = [r for r in pool if r["single_ms"] <= max_latency_ms]
+        if not fast:
+            best = min(pool, key=lambda r: r["single_ms"])
+            raise SystemExit(
+                f"no candidate meets --max-latency-ms {max_latency_ms}: "
+                f"fastest is {best['name']} at {best['single_ms']:.2f} ms"
+            )
+        pool = fast
+    return min(pool, key=lambda r: r["mae"])
+
+
+# ── Main ─────────────────────────────────────────────────────────────────────
+
+def save_model(model: Pipeline, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write then rename, so a running API watching MODEL_PATH never reads half a file
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _sketch_buckets(relative_accuracy: float):
+    """Vectorised QuantileSketch._index; values <= 0 go below every bucket."""
+    log_gamma = np.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+    def bucket(values):
+        values = np.asarray(values, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(values > 0, np.ceil(np.log(values) / log_gamma), -np.inf)
+
+    return bucket
+
+
+def baseline_stats(X: pd.DataFrame, prices) -> dict:
+    """
+    Training-set distributions the API compares live traffic with
+    (app/services/drift.py): quantiles, decile bins with their exact shares
+    (for PSI) and category shares.
+    """
+    stats = {"rows": len(X), "numeric": {}, "categorical": {}}
+    columns = {name: X[name] for name in NUMERIC_FEATURES}
+    columns[PRICE_FEATURE] = pd.Series(prices)
+    for name, values in columns.items():
+        values = values.dropna().to_numpy(dtype=float)
+        # repeated values (e.g. seats) collapse some deciles, so keep unique edges
+        edges = np.unique(np.quantile(values, np.linspace(0.1, 0.9, 9)))
+        # Bin by sketch bucket, exactly like QuantileSketch.rank does for live
+        # traffic: a bucket that straddles an edge then counts the same on both sides
+        bucket = _sketch_buckets(SKETCH_ACCURACY.get(name, DEFAULT_SKETCH_ACCURACY))
+        bins = np.searchsorted(bucket(edges), bucket(values), side='left')
+        stats["numeric"][name] = {
+            "quantiles": {str(q): float(np.quantile(values, q)) for q in QUANTILES},
+            "mean": float(values.mean()),
+            "edges": edges.tolist(),
+            "shares": (np.bincount(bins, minlength=len(edges) + 1) / len(values)).tolist(),
+        }
+    for name in CATEGORICAL_FEATURES:
+        stats["categorical"][name] = X[name].value_counts(normalize=True).to_dict()
+    return stats
+
+
+def save_baseline(stats: dict, path: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DATA_FILE_PATH)
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--search", action="store_true", help="fit and compare all candidates")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="parallel fits (-1 = all cores)")
+    parser.add_argument("--select", default="default", choices=["default", "accuracy", "pareto"],
+                        help="which candidate to save after --search")
+    parser.add_argument("--max-latency-ms", type=float, default=None,
+                        help="only consider candidates under this single-row latency")
+    parser.add_argument("--report", default=None, help="write the comparison as JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="where to write the training-set stats used for drift monitoring")
+    parser.add_argument("--baseline-only", action="store_true",
+                        help="only write the drift baseline for the model already at --output (no refit)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore cached data/preprocessing")
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        memory.clear(warn=False)
+
+    X_train, X_test, y_train, y_test = load_split(args.data, file_hash(args.data))
+
+    if args.baseline_only:
+        # Same training split, the model that is already shipped
+        model = joblib.load(args.output)
+        save_baseline(baseline_stats(X_train, model.predict(X_train)), args.baseline)
+        print(f"saved drift baseline for {args.output} to {args.baseline}")
+        return
+
+    preprocessor, Xt_train, Xt_test = preprocess(build_preprocessor(), X_train, X_test)
+
+    pool = candidates() if args.search else {"gbr_200_d5": default_regressor()}
+    fitted = joblib.Parallel(n_jobs=args.n_jobs)(
+        joblib.delayed(fit_candidate)(name, reg, Xt_train, y_train, Xt_test, y_test)
+        for name, reg in pool.items()
+    )
+
+    # Latency is measured after the parallel fits, one model at a time,
+    # so candidates don't slow each other down
+    results = []
+    for r in fitted:
+        model = Pipeline(steps=[('Preprocessing', preprocessor), ('model', r.pop("regressor"))])
+        r.update(measure_latency(model, X_test))
+        r["model"] = model
+        results.append(r)
+
+    front = set(pareto_front(results))
+    print(f"{'candidate':<14}{'MAE':>12}{'R2':>8}{'fit s':>8}{'1-row ms':>10}{'batch us/row':>14}  pareto")
+    for r in sorted(results, key=lambda r: r["mae"]):
+        print(f"{r['name']:<14}{r['mae']:>12,.0f}{r['r2']:>8.3f}{r['fit_seconds']:>8.2f}"
+              f"{r['single_ms']:>10.3f}{r['batch_us_per_row']:>14.2f}  {'*' if r['name'] in front else ''}")
+
+    chosen = select(results, args.select if args.search else "default", args.max_latency_ms)
+    save_model(chosen["model"], args.output)
+    print(f"saved {chosen['name']} to {args.output}")
+
+    # The predicted-price baseline is the model's own output on the training set
+    save_baseline(baseline_stats(X_train, chosen["model"].predict(X_train)), args.baseline)
+    print(f"saved drift baseline to {args.baseline}")
 
-# Train the model
-gb_model.fit(X_train, y_train)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({
+                "selected": chosen["name"],
+                "pareto_front": sorted(front),
+                "candidates": [{k: v for k, v in r.items() if k != "model"} for r in results],
+            }, f, indent=2)
 
 
-# Store the model
-os.makedirs(MODEL_DIR, exist_ok=True)
-joblib.dump(gb_model, MODEL_PATH)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
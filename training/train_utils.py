@@ -11,4 +11,39 @@ APP_DIR = 'app'
 MODEL_DIR_NAME = 'models'
 MODEL_NAME = 'model.joblib'
 MODEL_DIR = os.path.join(APP_DIR, MODEL_DIR_NAME)
-MODEL_PATH = os.path.join(MODEL_DIR, MODEL_NAME)
\ No newline at end of file
+MODEL_PATH = os.path.join(MODEL_DIR, MODEL_NAME)
+
+# Columns the model never sees
+DROP_COLUMNS = ['name', 'model', 'edition']
+TARGET = 'selling_price'
+# Companies with fewer listings than this are grouped as 'Others'
+MIN_COMPANY_COUNT = 100
+
+# Distributions the API watches for drift (see app/services/drift.py);
+# the training script writes their baseline next to the model
+NUMERIC_FEATURES = ['year', 'km_driven', 'mileage_mpg', 'engine_cc', 'max_power_bhp', 'torque_nm', 'seats']
+CATEGORICAL_FEATURES = ['company', 'fuel', 'owner', 'transmission', 'seller_type']
+PRICE_FEATURE = 'predicted_price'
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Relative accuracy of the live quantile sketches (app/utils/sketches.py).
+# The error is relative to the value, so the year needs much finer buckets
+SKETCH_ACCURACY = {'year': 0.0001}
+DEFAULT_SKETCH_ACCURACY = 0.01
+BASELINE_PATH = os.path.join(MODEL_DIR, 'baseline_stats.json')
+
+
+def load_dataset(path: str = DATA_FILE_PATH):
+    """Read and clean the car dataset exactly the way the model was trained on it."""
+    import pandas as pd
+
+    return (
+        pd.read_csv(path)
+          .drop_duplicates()
+          .drop(columns=DROP_COLUMNS)
+          .assign(
+              company=lambda x: x['company'].where(
+                  x['company'].map(x['company'].value_counts()) > MIN_COMPANY_COUNT,
+                  'Others'
+              )
+          )
+    )